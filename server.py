@@ -4,7 +4,9 @@ Main application entry point.
 Version 2.1 - With Tool Calling and MariaDB support.
 """
 
+import asyncio
 import threading
+from typing import Optional
 
 from fastapi import FastAPI, WebSocket
 from fastapi.staticfiles import StaticFiles
@@ -13,7 +15,14 @@ import uvicorn
 
 from src.config import get_config
 from src.tts_engine import get_tts_engine
-from src.llm_engine import get_llm_engine
+from src.tts_pool import get_tts_pool
+from src.llm_stats import get_llm_stats
+from src.load_monitor import get_load_monitor
+from src.model_warmup import get_model_warmer
+from src.ollama_pool import get_ollama_pool
+from src.response_cache import get_response_cache
+from src.session_manager import get_session_manager
+from src.session_store import get_session_store
 from src.websocket_handler import get_ws_handler
 
 
@@ -30,6 +39,9 @@ app = FastAPI(
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
+# Background tasks started at startup (references kept alive here)
+background_tasks = set()
+
 
 # ============================================
 # HTTP Routes
@@ -42,27 +54,67 @@ async def serve_index():
 
 
 @app.get("/api/status")
-async def get_status():
-    """Return system status."""
+async def get_status(session_id: Optional[str] = None):
+    """Return system status (and session details if `session_id` is given)."""
     tts = get_tts_engine()
-    llm = get_llm_engine()
+    sessions = get_session_manager()
     
-    return JSONResponse({
+    status = {
         "status": "online",
         "tts_ready": tts.is_ready,
+        "llm_ready": get_model_warmer().is_ready,
+        "llm_warmup": get_model_warmer().status,
         "model": config.llm.model,
+        "backends": get_ollama_pool().status,
+        "load": get_load_monitor().status,
         "voice": config.tts.voice,
-        "history_length": llm.history_length,
-        "tools_enabled": llm.tools_enabled,
-        "database_enabled": config.database.enabled
-    })
+        "tts_workers": get_tts_pool().status,
+        "sessions": sessions.count,
+        "active_sessions": sessions.active_count,
+        "tools_enabled": sessions.tools_enabled,
+        "database_enabled": config.database.enabled,
+        "cache": get_response_cache().stats
+    }
+    
+    session = sessions.get(session_id) if session_id else None
+    if session:
+        status["session_id"] = session.session_id
+        status["history_length"] = session.engine.history_length
+        status["history_tokens"] = session.engine.history_tokens
+        status["prefill"] = session.engine.prefill_metrics
+    
+    return JSONResponse(status)
+
+
+@app.get("/api/stats")
+async def get_stats(session_id: Optional[str] = None):
+    """
+    Return LLM generation statistics (queue wait, prefill, decode).
+    
+    Global statistics are grouped per model and per call kind;
+    `session_id` adds the statistics of that session and its recent turns.
+    """
+    stats = {"global": get_llm_stats().summary}
+    
+    session = get_session_manager().get(session_id) if session_id else None
+    if session:
+        stats["session_id"] = session.session_id
+        stats["session"] = session.engine.stats
+    
+    return JSONResponse(stats)
 
 
 @app.post("/api/reset")
-async def reset_history():
-    """Reset conversation history."""
-    llm = get_llm_engine()
-    llm.reset()
+async def reset_history(session_id: Optional[str] = None):
+    """Reset the conversation history of a session."""
+    session = get_session_manager().get(session_id) if session_id else None
+    if not session:
+        return JSONResponse({
+            "status": "error",
+            "message": "Unknown session"
+        }, status_code=404)
+    
+    session.engine.reset()
     
     return JSONResponse({
         "status": "reset",
@@ -70,6 +122,22 @@ async def reset_history():
     })
 
 
+@app.post("/api/cache/clear")
+async def clear_cache():
+    """Clear the response cache (e.g. after the database changed)."""
+    get_response_cache().clear()
+    
+    # Tool results shared between sessions are stale too
+    if config.tools.enabled:
+        from src.tools.registry import get_tool_registry
+        get_tool_registry().invalidate_data()
+    
+    return JSONResponse({
+        "status": "cleared",
+        "message": "Response cache cleared"
+    })
+
+
 # ============================================
 # WebSocket
 # ============================================
@@ -100,7 +168,8 @@ def init_database():
             user=config.database.user,
             password=config.database.password,
             database=config.database.database,
-            allow_write=config.database.allow_write
+            allow_write=config.database.allow_write,
+            pool_size=config.database.pool_size
         )
         
         if client.connect():
@@ -130,9 +199,8 @@ def init_tools():
         # Initialize tool registry
         registry = init_tool_registry()
         
-        # Connect registry to LLM Engine
-        llm = get_llm_engine()
-        llm.set_tool_registry(registry)
+        # Connect registry to conversation sessions
+        get_session_manager().set_tool_registry(registry)
         
         print(f"[Tools] Tools system initialized ({registry.count} tools)")
         
@@ -162,17 +230,37 @@ async def startup_event():
     if db_ok or not config.database.enabled:
         init_tools()
     
+    # Evict idle sessions in background
+    background_tasks.add(asyncio.create_task(get_session_manager().run_sweeper()))
+    
+    # Load the LLM model and keep it warm in background
+    background_tasks.add(asyncio.create_task(get_model_warmer().run()))
+    
+    # Probe Ollama backends in background
+    background_tasks.add(asyncio.create_task(get_ollama_pool().run_health_checks()))
+    
+    # Compact the persistent session store in background
+    background_tasks.add(asyncio.create_task(get_session_store().run_compaction()))
+    
     # Show status
     print(f"\n[Server] Port: {config.server.port}")
     print(f"[Server] LLM Model: {config.llm.model}")
     print(f"[Server] TTS Voice: {config.tts.voice}")
     print(f"[Server] Tools: {'Enabled' if config.tools.enabled else 'Disabled'}")
     print(f"[Server] Database: {'Enabled' if config.database.enabled else 'Disabled'}")
+    print(f"[Server] Persistent sessions: {'Enabled' if config.sessions.persist else 'Disabled'}")
     print(f"\n[Server] Interface: http://localhost:{config.server.port}")
     print(f"[Server] WebSocket: ws://localhost:{config.server.port}/ws")
     print()
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Commit pending session store writes and stop TTS threads."""
+    get_session_store().close()
+    get_tts_engine().shutdown()
+
+
 # ============================================
 # Main
 # ============================================
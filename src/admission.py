@@ -0,0 +1,153 @@
+"""
+TAMARA Admission Control Module
+Concurrency limit and priority wait queue for LLM generations.
+"""
+
+import asyncio
+import itertools
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, List, Optional
+
+
+# Priorities (lower value = served first)
+PRIORITY_VOICE = 0
+PRIORITY_TEXT = 1
+PRIORITY_BATCH = 2
+
+PRIORITIES = {
+    "voice": PRIORITY_VOICE,
+    "text": PRIORITY_TEXT,
+    "batch": PRIORITY_BATCH,
+}
+
+# Callback receiving the 1-based queue position of a waiting request
+PositionCallback = Callable[[int], Awaitable[None]]
+
+
+class QueueFullError(Exception):
+    """The wait queue is full; the request is rejected immediately."""
+    pass
+
+
+class _Waiter:
+    """A request waiting for a slot."""
+    
+    def __init__(self, priority: int, seq: int):
+        self.priority = priority
+        self.seq = seq
+        self.granted = False
+        self.changed = asyncio.Event()
+    
+    @property
+    def order(self):
+        """Sort key: priority first, then arrival order."""
+        return (self.priority, self.seq)
+
+
+class AdmissionController:
+    """
+    Limits concurrent generations on a backend.
+    
+    Up to `max_concurrency` requests run at once. Further requests wait
+    in a queue of at most `max_queue` entries, served by priority and
+    then arrival order. When the queue is full, new requests fail fast
+    with QueueFullError instead of piling onto the backend.
+    
+    Example:
+        admission = AdmissionController(max_concurrency=4, max_queue=32)
+        async with admission.slot(PRIORITY_VOICE, on_position=notify):
+            ...  # run the generation
+    """
+    
+    def __init__(self, max_concurrency: int, max_queue: int):
+        self._max_concurrency = max(1, max_concurrency)
+        self._max_queue = max(0, max_queue)
+        self._active = 0
+        self._queue: List[_Waiter] = []
+        self._seq = itertools.count()
+        self.rejected = 0
+    
+    @property
+    def active(self) -> int:
+        """Requests currently running."""
+        return self._active
+    
+    @property
+    def queued(self) -> int:
+        """Requests waiting for a slot."""
+        return len(self._queue)
+    
+    @property
+    def is_full(self) -> bool:
+        """Indicates if a new request would be rejected."""
+        return self._active >= self._max_concurrency and len(self._queue) >= self._max_queue
+    
+    def _position(self, waiter: _Waiter) -> int:
+        """1-based position of a waiter in service order."""
+        return 1 + sum(1 for w in self._queue if w.order < waiter.order)
+    
+    def _notify_queue(self) -> None:
+        """Wake up waiters so they can report their new position."""
+        for waiter in self._queue:
+            waiter.changed.set()
+    
+    def _release(self) -> None:
+        """Hand the slot to the next waiter, or free it."""
+        if self._queue:
+            waiter = min(self._queue, key=lambda w: w.order)
+            self._queue.remove(waiter)
+            waiter.granted = True
+            self._notify_queue()
+            waiter.changed.set()
+        else:
+            self._active -= 1
+    
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_TEXT,
+                   on_position: Optional[PositionCallback] = None) -> AsyncIterator[None]:
+        """
+        Acquire a generation slot.
+        
+        Args:
+            priority: Request priority (PRIORITY_*).
+            on_position: Awaited with the queue position while waiting.
+            
+        Raises:
+            QueueFullError: If the queue is full.
+        """
+        if self._active < self._max_concurrency and not self._queue:
+            self._active += 1
+        else:
+            if len(self._queue) >= self._max_queue:
+                self.rejected += 1
+                raise QueueFullError("Server busy, please try again")
+            await self._wait(_Waiter(priority, next(self._seq)), on_position)
+        
+        try:
+            yield
+        finally:
+            self._release()
+    
+    async def _wait(self, waiter: _Waiter, on_position: Optional[PositionCallback]) -> None:
+        """Wait in queue until the waiter is granted a slot."""
+        self._queue.append(waiter)
+        self._notify_queue()
+        last_position = None
+        
+        try:
+            while not waiter.granted:
+                waiter.changed.clear()
+                position = self._position(waiter)
+                if on_position and position != last_position:
+                    last_position = position
+                    await on_position(position)
+                if not waiter.granted:
+                    await waiter.changed.wait()
+        except BaseException:
+            if waiter.granted:
+                # Slot was handed over while we were leaving: pass it on
+                self._release()
+            else:
+                self._queue.remove(waiter)
+                self._notify_queue()
+            raise
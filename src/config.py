@@ -6,7 +6,7 @@ Supports environment variables for sensitive credentials.
 
 import os
 from dataclasses import dataclass, field
-from typing import Optional, List
+from typing import Dict, Optional, List
 
 import yaml
 
@@ -74,9 +74,74 @@ def get_env_int(key: str, default: int = 0) -> int:
 
 @dataclass
 class LLMConfig:
-    """Language model configuration."""
+    """
+    Language model configuration.
+    
+    History is bounded by an estimated token budget:
+    `context_window - response_reserve - tool definitions`.
+    `max_history` is kept as an additional cap on message count.
+    """
     model: str = field(default_factory=lambda: get_env("TAMARA_LLM_MODEL", "gpt-oss:20b"))
     max_history: int = 500
+    context_window: int = 8192
+    response_reserve: int = 1024
+    max_tool_result_ratio: float = 0.25
+    # Once over budget, history is cut down to this ratio in one block
+    # so the prompt prefix stays stable (and cached) between cuts
+    trim_target_ratio: float = 0.7
+    # Background compaction: once history exceeds `compaction_threshold`
+    # of the token budget, older turns are summarized by the model
+    compaction_enabled: bool = True
+    compaction_threshold: float = 0.6
+    compaction_keep_messages: int = 6
+    compaction_model: str = ""  # Empty = use `model`
+    # Model cascade: a small `router_model` decides which tools to call
+    # and with which arguments, `model` only writes the final answer.
+    # With `router_direct_answers`, turns that need no tool are answered
+    # by the router alone
+    router_model: str = ""  # Empty = disabled
+    router_direct_answers: bool = True
+    # Generation options sent to Ollama (`num_ctx` is `context_window`).
+    # `num_predict` is a backstop on answers (reasoning included, except
+    # for answers streamed by a tool decision, where only the answer
+    # counts); spoken length is limited by the answer budget below.
+    # Sessions can override them, see LLMEngine.update_settings
+    num_predict: int = 2048  # Max generated tokens per answer (-1 = unbounded)
+    stop: List[str] = field(default_factory=list)
+    # Spoken answer budget: generation is stopped at the first sentence
+    # end once either limit is reached (0 = no limit)
+    max_answer_words: int = 50
+    max_answer_sentences: int = 0
+    # Load-adaptive degradation: while the backends are saturated, new
+    # turns use `fallback_model` and/or `degraded_num_predict` (empty/0 =
+    # unchanged; both unset = disabled). Load is the wait queue per
+    # backend and the average time to first token over `latency_window`
+    # seconds; normal mode returns below the `recover_*` thresholds
+    fallback_model: str = ""
+    degraded_num_predict: int = 0
+    degrade_queue_depth: int = 4
+    degrade_latency: float = 8.0
+    recover_queue_depth: int = 1
+    recover_latency: float = 3.0
+    latency_window: int = 30
+    # Model residency: keep_alive is sent on every chat call, the model
+    # is warmed up at startup and re-warmed every `keep_warm_interval`
+    keep_alive: str = "30m"
+    warmup_enabled: bool = True
+    keep_warm_interval: int = 240  # Seconds, 0 = disabled
+    # Identical concurrent requests share a single Ollama generation
+    coalesce_requests: bool = True
+    # Ollama backends (empty = default host / OLLAMA_HOST). Requests go
+    # to the least busy healthy backend, sessions stick to their backend
+    # while it is within `affinity_slack` requests of the least busy one
+    endpoints: List[str] = field(default_factory=list)
+    affinity_slack: int = 2
+    health_check_interval: int = 15  # Seconds, 0 = disabled
+    health_check_timeout: float = 3.0
+    # Admission control per backend: concurrent generations and size of
+    # the priority wait queue (requests beyond it are rejected at once)
+    max_concurrency: int = 4
+    max_queue: int = 32
     system_prompt: str = (
         "You are TAMARA, an intelligent voice assistant with access to tools. "
         "Respond in Spanish in a conversational and brief manner. "
@@ -96,6 +161,24 @@ class TTSConfig:
     voice: str = "ef_dora"
     speed: float = 1.1
     language: str = "es"
+    # Synthesis runs in a dedicated thread pool, off the event loop.
+    # Requests beyond `workers + max_pending` wait their turn
+    workers: int = 2
+    max_pending: int = 8
+    # Sentences of one response synthesized concurrently (sent in order)
+    pipeline_depth: int = 3
+    # Text chunking for synthesis: short sentences are merged up to
+    # `chunk_min_chars`, long ones cut at `chunk_max_chars`; the first
+    # chunk may end at a comma once it has `first_chunk_chars`
+    chunk_min_chars: int = 40
+    chunk_max_chars: int = 250
+    first_chunk_chars: int = 15
+    # Worker processes, each with its own Kokoro/ONNX session limited to
+    # `intra_op_threads` threads (0 = synthesize in-process with `workers`
+    # threads). `pin_cores` pins each process to its own cores (Linux)
+    processes: int = 0
+    intra_op_threads: int = 2
+    pin_cores: bool = False
 
 
 @dataclass
@@ -127,11 +210,27 @@ class DatabaseConfig:
     password: str = field(default_factory=lambda: get_env("TAMARA_DB_PASSWORD", ""))
     database: str = field(default_factory=lambda: get_env("TAMARA_DB_NAME", ""))
     allow_write: bool = field(default_factory=lambda: get_env_bool("TAMARA_DB_ALLOW_WRITE", False))
+    # Pooled connections; concurrent tool calls beyond this wait for one
+    pool_size: int = 3
 
 
 @dataclass
 class ToolsConfig:
-    """Tools system configuration."""
+    """
+    Tools system configuration.
+    
+    A turn may run up to `max_rounds` tool rounds within `turn_timeout`
+    seconds. Each tool call is limited to `tool_timeout` seconds.
+    With `coalesce_calls`, identical concurrent read-only calls run only once.
+    
+    Tool results are compacted to `result_tokens` (or the per-tool
+    value in `result_budgets`) before entering history; text fields of
+    query rows are cut at `result_field_chars`.
+    
+    When more than `select_top_k` tools are registered, each turn only
+    sends the `select_top_k` most relevant to the user message plus
+    `pinned_tools` (all of them if none scores `select_min_score`).
+    """
     enabled: bool = True
     available: List[str] = field(default_factory=lambda: [
         "list_database_tables",
@@ -139,6 +238,54 @@ class ToolsConfig:
         "query_database",
         "get_table_count"
     ])
+    max_rounds: int = 4
+    turn_timeout: float = 60.0
+    tool_timeout: float = 20.0
+    coalesce_calls: bool = True
+    result_tokens: int = 500
+    result_budgets: Dict[str, int] = field(default_factory=dict)
+    result_field_chars: int = 80
+    select_top_k: int = 6  # 0 = always send every tool
+    pinned_tools: List[str] = field(default_factory=list)
+    select_min_score: float = 0.15
+
+
+@dataclass
+class SessionConfig:
+    """
+    Conversation sessions configuration.
+    
+    Each WebSocket connection gets its own session. Idle sessions are
+    evicted after `idle_ttl` seconds, and the least recently used ones
+    are evicted when `max_sessions` or `max_memory_mb` is exceeded.
+    
+    With `persist`, histories are also logged to an SQLite store, so
+    evicted sessions (or all of them, after a restart) are restored when
+    their client reconnects. Superseded events are compacted every
+    `store_compact_interval` seconds; sessions idle for `retention_days`
+    are deleted.
+    """
+    max_sessions: int = 200
+    idle_ttl: int = 1800
+    max_memory_mb: int = 256
+    sweep_interval: int = 60
+    persist: bool = False
+    store_path: str = "data/sessions.db"
+    retention_days: int = 30
+    store_compact_interval: int = 3600
+
+
+@dataclass
+class CacheConfig:
+    """
+    Response cache configuration.
+    
+    Caches complete turns (tokens and TTS audio) keyed on the normalized
+    user message and the session context. Disabled by default.
+    """
+    enabled: bool = False
+    ttl: int = 300
+    max_entries: int = 256
 
 
 @dataclass
@@ -149,6 +296,8 @@ class Config:
     server: ServerConfig = field(default_factory=ServerConfig)
     database: DatabaseConfig = field(default_factory=DatabaseConfig)
     tools: ToolsConfig = field(default_factory=ToolsConfig)
+    sessions: SessionConfig = field(default_factory=SessionConfig)
+    cache: CacheConfig = field(default_factory=CacheConfig)
     
     @classmethod
     def load(cls, config_path: str = "config.yaml") -> "Config":
@@ -192,6 +341,18 @@ class Config:
                     for key, value in data['tools'].items():
                         if hasattr(config.tools, key):
                             setattr(config.tools, key, value)
+                
+                # Sessions Config
+                if 'sessions' in data:
+                    for key, value in data['sessions'].items():
+                        if hasattr(config.sessions, key):
+                            setattr(config.sessions, key, value)
+                
+                # Cache Config
+                if 'cache' in data:
+                    for key, value in data['cache'].items():
+                        if hasattr(config.cache, key):
+                            setattr(config.cache, key, value)
                             
             except Exception as e:
                 print(f"[Config] Error loading config.yaml: {e}")
@@ -205,6 +366,37 @@ class Config:
             'llm': {
                 'model': self.llm.model,
                 'max_history': self.llm.max_history,
+                'context_window': self.llm.context_window,
+                'response_reserve': self.llm.response_reserve,
+                'max_tool_result_ratio': self.llm.max_tool_result_ratio,
+                'trim_target_ratio': self.llm.trim_target_ratio,
+                'compaction_enabled': self.llm.compaction_enabled,
+                'compaction_threshold': self.llm.compaction_threshold,
+                'compaction_keep_messages': self.llm.compaction_keep_messages,
+                'compaction_model': self.llm.compaction_model,
+                'router_model': self.llm.router_model,
+                'router_direct_answers': self.llm.router_direct_answers,
+                'num_predict': self.llm.num_predict,
+                'stop': self.llm.stop,
+                'max_answer_words': self.llm.max_answer_words,
+                'max_answer_sentences': self.llm.max_answer_sentences,
+                'fallback_model': self.llm.fallback_model,
+                'degraded_num_predict': self.llm.degraded_num_predict,
+                'degrade_queue_depth': self.llm.degrade_queue_depth,
+                'degrade_latency': self.llm.degrade_latency,
+                'recover_queue_depth': self.llm.recover_queue_depth,
+                'recover_latency': self.llm.recover_latency,
+                'latency_window': self.llm.latency_window,
+                'keep_alive': self.llm.keep_alive,
+                'warmup_enabled': self.llm.warmup_enabled,
+                'keep_warm_interval': self.llm.keep_warm_interval,
+                'coalesce_requests': self.llm.coalesce_requests,
+                'endpoints': self.llm.endpoints,
+                'affinity_slack': self.llm.affinity_slack,
+                'health_check_interval': self.llm.health_check_interval,
+                'health_check_timeout': self.llm.health_check_timeout,
+                'max_concurrency': self.llm.max_concurrency,
+                'max_queue': self.llm.max_queue,
                 'system_prompt': self.llm.system_prompt,
             },
             'tts': {
@@ -213,6 +405,15 @@ class Config:
                 'voice': self.tts.voice,
                 'speed': self.tts.speed,
                 'language': self.tts.language,
+                'workers': self.tts.workers,
+                'max_pending': self.tts.max_pending,
+                'pipeline_depth': self.tts.pipeline_depth,
+                'chunk_min_chars': self.tts.chunk_min_chars,
+                'chunk_max_chars': self.tts.chunk_max_chars,
+                'first_chunk_chars': self.tts.first_chunk_chars,
+                'processes': self.tts.processes,
+                'intra_op_threads': self.tts.intra_op_threads,
+                'pin_cores': self.tts.pin_cores,
             },
             'server': {
                 'host': self.server.host,
@@ -228,10 +429,36 @@ class Config:
                 'password': self.database.password,
                 'database': self.database.database,
                 'allow_write': self.database.allow_write,
+                'pool_size': self.database.pool_size,
             },
             'tools': {
                 'enabled': self.tools.enabled,
                 'available': self.tools.available,
+                'max_rounds': self.tools.max_rounds,
+                'turn_timeout': self.tools.turn_timeout,
+                'tool_timeout': self.tools.tool_timeout,
+                'coalesce_calls': self.tools.coalesce_calls,
+                'result_tokens': self.tools.result_tokens,
+                'result_budgets': self.tools.result_budgets,
+                'result_field_chars': self.tools.result_field_chars,
+                'select_top_k': self.tools.select_top_k,
+                'pinned_tools': self.tools.pinned_tools,
+                'select_min_score': self.tools.select_min_score,
+            },
+            'sessions': {
+                'max_sessions': self.sessions.max_sessions,
+                'idle_ttl': self.sessions.idle_ttl,
+                'max_memory_mb': self.sessions.max_memory_mb,
+                'sweep_interval': self.sessions.sweep_interval,
+                'persist': self.sessions.persist,
+                'store_path': self.sessions.store_path,
+                'retention_days': self.sessions.retention_days,
+                'store_compact_interval': self.sessions.store_compact_interval,
+            },
+            'cache': {
+                'enabled': self.cache.enabled,
+                'ttl': self.cache.ttl,
+                'max_entries': self.cache.max_entries,
             }
         }
         
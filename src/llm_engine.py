@@ -4,12 +4,109 @@ Ollama client with Tool Calling support.
 """
 
 import asyncio
+import copy
+import hashlib
 import json
-from typing import Generator, List, Dict, Any, Optional, AsyncGenerator, Callable
-
-import ollama
+import time
+from collections import deque
+from contextlib import aclosing
+from typing import List, Dict, Any, Optional, AsyncGenerator, Callable, Deque
 
+from .admission import PRIORITIES, PRIORITY_BATCH, PRIORITY_TEXT, PositionCallback, QueueFullError
 from .config import get_config
+from .llm_stats import (
+    CALL_ANSWER,
+    CALL_COMPACTION,
+    CALL_FINAL,
+    CALL_TOOL_DECISION,
+    CallStats,
+    StatsAggregate,
+    get_llm_stats,
+)
+from .load_monitor import get_load_monitor
+from .ollama_pool import get_ollama_pool
+from .session_store import get_session_store
+from .single_flight import SingleFlight, request_key
+from .tokens import (
+    CHARS_PER_TOKEN,
+    estimate_message_tokens,
+    estimate_tokens,
+    truncate_to_tokens,
+)
+
+
+# Number of recent turns kept in generation statistics
+STATS_TURNS = 50
+
+# Prefix of the system message holding the rolling conversation summary
+SUMMARY_PREFIX = "Summary of the earlier conversation: "
+
+COMPACTION_PROMPT = (
+    "Summarize the following conversation between a user and the voice "
+    "assistant TAMARA. Keep facts, names, numbers, database results and "
+    "open questions that may be needed later. Write in Spanish, in at "
+    "most 120 words, as plain prose."
+)
+
+
+# Generation settings a session may override, with their type
+SESSION_SETTINGS = {
+    'num_predict': int,
+    'stop': list,
+    'max_answer_words': int,
+    'max_answer_sentences': int,
+}
+
+SENTENCE_ENDINGS = ".!?"
+
+
+class AnswerBudget:
+    """
+    Word/sentence budget of a spoken answer.
+    
+    A sentence end is only confirmed by the whitespace that follows it
+    (so "3.5" or "Sr.Pérez" never end a sentence), which is why the
+    check takes the text so far together with the next token.
+    
+    Attributes:
+        _max_words: Word limit (0 = none).
+        _max_sentences: Sentence limit (0 = none).
+        _sentences: Sentences confirmed so far.
+        _last_end: Length of the text at the last confirmed end.
+    """
+    
+    def __init__(self, max_words: int = 0, max_sentences: int = 0):
+        self._max_words = max_words
+        self._max_sentences = max_sentences
+        self._sentences = 0
+        self._last_end = 0
+    
+    def exhausted(self, text: str, next_token: str) -> bool:
+        """
+        Check whether the answer should stop before `next_token`.
+        
+        Args:
+            text: Answer generated so far.
+            next_token: Token about to be emitted.
+            
+        Returns:
+            True if `text` ends a sentence and a limit is reached.
+        """
+        if not (self._max_words or self._max_sentences):
+            return False
+        if not next_token[:1].isspace():
+            return False
+        
+        stripped = text.rstrip()
+        if not stripped or stripped[-1] not in SENTENCE_ENDINGS:
+            return False
+        if len(stripped) != self._last_end:
+            self._last_end = len(stripped)
+            self._sentences += 1
+        
+        if self._max_sentences and self._sentences >= self._max_sentences:
+            return True
+        return bool(self._max_words) and len(stripped.split()) >= self._max_words
 
 
 class LLMEngine:
@@ -20,19 +117,67 @@ class LLMEngine:
     1. Simple chat: Direct LLM responses
     2. Chat with tools: LLM can invoke tools and use their results
     
+    Each conversation session owns its own engine, so history and
+    settings (model, system prompt) are never shared between clients.
+    
+    History is bounded by an estimated token budget. Token counts are
+    computed once per message at insertion and kept in `_token_counts`
+    (parallel to `_history`), so trimming never re-measures the history.
+    
+    When history grows past `compaction_threshold` of the budget, older
+    turns are summarized in a background task and replaced by a single
+    summary message right after the system prompt.
+    
+    Answers are capped at `num_predict` tokens: answer calls through the
+    Ollama option, answers streamed by a tool decision by counting the
+    forwarded tokens (the decision itself is not capped, so a reasoning
+    model can still think before calling a tool). Answers are also
+    stopped early, at a sentence end, once the spoken answer budget
+    (`max_answer_words`, `max_answer_sentences`) is reached.
+    
+    While the backends are overloaded, the LoadMonitor marks new turns
+    as degraded: they use `fallback_model` / `degraded_num_predict`.
+    
+    With `sessions.persist`, every history change is logged to the
+    SessionStore (appends as messages, rewrites as snapshots), so the
+    session can be restored after an eviction or restart.
+    
     Attributes:
-        _config: LLM configuration.
+        priority: Admission priority of this session's requests.
+        on_queue_position: Awaited with the queue position while a
+            request waits for a backend slot.
+        _session_id: Owning session (used for backend affinity).
+        _config: LLM configuration (private copy for this session).
         _history: Conversation history.
+        _token_counts: Estimated tokens of each history message.
+        _history_tokens: Running total of `_token_counts`.
+        _tools_tokens: Estimated tokens of all tool definitions (reserved
+            in the history budget even when a turn sends fewer).
         _tool_registry: Available tools registry (optional).
         _tools_enabled: Whether tools system is active.
+        _degraded: Whether the current turn runs in degraded mode.
+        _persist: Whether history changes are logged to the SessionStore.
+        _turns: Generation statistics of recent turns.
+        _stats: Statistics of all this session's calls, per call kind.
     """
     
-    def __init__(self):
-        self._config = get_config().llm
+    def __init__(self, session_id: Optional[str] = None):
+        self.priority = PRIORITY_TEXT
+        self.on_queue_position: Optional[PositionCallback] = None
+        self._session_id = session_id
+        self._config = copy.copy(get_config().llm)
         self._tools_config = get_config().tools
         self._history: List[Dict[str, Any]] = []
+        self._token_counts: List[int] = []
+        self._history_tokens = 0
+        self._tools_tokens = 0
         self._tool_registry = None
         self._tools_enabled = False
+        self._compaction_task: Optional[asyncio.Task] = None
+        self._turns: Deque[Dict[str, Any]] = deque(maxlen=STATS_TURNS)
+        self._stats: Dict[str, StatsAggregate] = {}
+        self._degraded = False
+        self._persist = session_id is not None and get_session_store().enabled
         self._reset_history()
     
     def set_tool_registry(self, registry) -> None:
@@ -44,26 +189,125 @@ class LLMEngine:
         """
         self._tool_registry = registry
         self._tools_enabled = registry is not None and self._tools_config.enabled
+        self._tools_tokens = 0
         if self._tools_enabled:
-            print(f"[LLM] Tools enabled: {registry.tool_names}")
+            tools_json = json.dumps(registry.get_ollama_tools(), ensure_ascii=False)
+            self._tools_tokens = estimate_tokens(tools_json)
+    
+    def close(self) -> None:
+        """Stop background work of this engine (a pending compaction)."""
+        if self._compaction_task and not self._compaction_task.done():
+            self._compaction_task.cancel()
     
     def _reset_history(self) -> None:
         """Reset history with system prompt."""
-        self._history = [{
+        self.close()
+        self._history = []
+        self._token_counts = []
+        self._history_tokens = 0
+        self._append({
             'role': 'system',
             'content': self._config.system_prompt
-        }]
+        }, persist=False)
     
     @property
     def history_length(self) -> int:
         """Return number of messages in history (excluding system prompt)."""
         return len(self._history) - 1
     
+    @property
+    def history_tokens(self) -> int:
+        """Estimated tokens of the whole history (including system prompt)."""
+        return self._history_tokens
+    
+    @property
+    def token_budget(self) -> int:
+        """Maximum estimated tokens the history may use."""
+        budget = (
+            self._config.context_window
+            - self._config.response_reserve
+            - self._tools_tokens
+        )
+        return max(budget, 256)
+    
+    @property
+    def memory_usage(self) -> int:
+        """Approximate memory retained by the history, in bytes."""
+        return int(self._history_tokens * CHARS_PER_TOKEN)
+    
+    @property
+    def degraded(self) -> bool:
+        """Indicates if the current (or last) turn ran in degraded mode."""
+        return self._degraded
+    
     @property
     def tools_enabled(self) -> bool:
         """Indicates if tools system is active."""
         return self._tools_enabled and self._tool_registry is not None
     
+    def _append(self, message: Dict[str, Any], persist: bool = True) -> None:
+        """
+        Append a message to history, caching its token count.
+        
+        Args:
+            message: Chat message.
+            persist: Log the message to the session store.
+        """
+        tokens = estimate_message_tokens(message)
+        self._history.append(message)
+        self._token_counts.append(tokens)
+        self._history_tokens += tokens
+        if persist and self._persist:
+            get_session_store().append_message(self._session_id, message)
+    
+    def _persist_snapshot(self) -> None:
+        """Log the whole history after a rewrite (trim, summary, reset)."""
+        if self._persist:
+            get_session_store().snapshot(self._session_id, self._history[1:])
+    
+    def restore(self, messages: List[Dict[str, Any]]) -> None:
+        """
+        Restore a persisted history (system prompt excluded).
+        
+        Args:
+            messages: Messages loaded from the session store.
+        """
+        self._reset_history()
+        for message in messages:
+            self._append(message, persist=False)
+        self._trim_history()
+    
+    def record_exchange(self, user_message: str, response: str) -> None:
+        """
+        Add a complete turn produced outside the model (e.g. a cache hit).
+        
+        Args:
+            user_message: User message.
+            response: Assistant response.
+        """
+        self.add_user_message(user_message)
+        self.add_assistant_message(response)
+    
+    def cache_fingerprint(self) -> str:
+        """
+        Fingerprint of the session configuration that shapes an answer:
+        models, generation settings, system prompt and, if tools are
+        enabled, tool set and tool-data version.
+        
+        The history is left out so repeated questions hit across
+        sessions and turns; the cache only takes self-contained messages.
+        
+        Returns:
+            Hex digest.
+        """
+        digest = hashlib.sha256(f"{self._config.model}:{self._config.router_model}".encode("utf-8"))
+        digest.update(json.dumps(self.settings, sort_keys=True).encode('utf-8'))
+        digest.update(hashlib.sha256(self._config.system_prompt.encode('utf-8')).digest())
+        if self.tools_enabled:
+            tools = f"{self._tool_registry.tool_names}:{self._tool_registry.data_version}"
+            digest.update(tools.encode('utf-8'))
+        return digest.hexdigest()
+    
     def add_user_message(self, content: str) -> None:
         """
         Add user message to history.
@@ -71,7 +315,7 @@ class LLMEngine:
         Args:
             content: Message content.
         """
-        self._history.append({
+        self._append({
             'role': 'user',
             'content': content
         })
@@ -84,34 +328,520 @@ class LLMEngine:
         Args:
             content: Message content.
         """
-        self._history.append({
+        self._append({
             'role': 'assistant',
             'content': content
         })
         self._trim_history()
+        self._schedule_compaction()
+    
+    def add_tool_calls(self, content: str, tool_calls: List[Dict[str, Any]]) -> None:
+        """
+        Add assistant message requesting tool calls to history.
+        
+        Args:
+            content: Message content (usually empty).
+            tool_calls: Requested calls, as {'function': {'name', 'arguments'}}.
+        """
+        self._append({
+            'role': 'assistant',
+            'content': content,
+            'tool_calls': tool_calls
+        })
+        self._trim_history()
     
     def add_tool_result(self, tool_name: str, result: str) -> None:
         """
         Add tool execution result to history.
         
+        Results larger than `max_tool_result_ratio` of the token budget
+        are truncated so a single output can't flush the whole context.
+        
         Args:
             tool_name: Name of executed tool.
             result: Execution result.
         """
-        self._history.append({
+        max_tokens = int(self.token_budget * self._config.max_tool_result_ratio)
+        self._append({
             'role': 'tool',
-            'content': result,
+            'content': truncate_to_tokens(result, max_tokens),
             'name': tool_name
         })
+        self._trim_history()
+    
+    def _discard_unanswered_message(self) -> None:
+        """Remove the last user message if it got no answer (e.g. rejected)."""
+        if len(self._history) > 1 and self._history[-1]['role'] == 'user':
+            self._history.pop()
+            self._history_tokens -= self._token_counts.pop()
+            self._persist_snapshot()
+    
+    def _rollback_turn(self) -> None:
+        """
+        Remove the current turn if it got no answer (e.g. rejected).
+        
+        Drops the last user message together with the tool calls and
+        results that followed it, so a turn rejected in a later tool
+        round or in the final answer leaves no dangling exchange.
+        """
+        for index in range(len(self._history) - 1, 0, -1):
+            message = self._history[index]
+            if message['role'] == 'user':
+                break
+            if message['role'] == 'assistant' and not message.get('tool_calls'):
+                return  # Already answered
+        else:
+            return
+        
+        del self._history[index:]
+        self._history_tokens -= sum(self._token_counts[index:])
+        del self._token_counts[index:]
+        self._persist_snapshot()
+    
+    def _save_interrupted(self, partial: str) -> None:
+        """
+        Record an answer interrupted by the user (barge-in).
+        
+        The part already generated is kept, since the user may have
+        heard it. If nothing was generated, the unanswered user
+        message is dropped.
+        
+        Args:
+            partial: Response generated before the interruption.
+        """
+        if partial.strip():
+            self.add_assistant_message(partial)
+        else:
+            self._discard_unanswered_message()
     
     def _trim_history(self) -> None:
-        """Trim history if it exceeds maximum."""
+        """
+        Trim history to the token budget and message cap.
+        
+        Drops the oldest messages (never the system prompt or the current
+        turn, from the last user message on) in a single slice. The cut is
+        extended so the history always restarts at a user message, keeping
+        tool calls and their results together. If the current turn alone
+        is over budget, its tool results are truncated instead. Each
+        message is measured once and dropped once, so trimming is O(1)
+        amortized per appended message.
+        
+        Trimming uses hysteresis: once a limit is exceeded, history is cut
+        down to `trim_target_ratio` of it in one block. Between cuts the
+        prompt prefix stays byte-identical, so Ollama can reuse its prompt
+        cache instead of re-evaluating the whole history every turn.
+        """
+        budget = self.token_budget
         max_msgs = self._config.max_history
-        if len(self._history) > max_msgs:
-            # Keep system prompt + last messages
-            self._history = [self._history[0]] + self._history[-(max_msgs - 1):]
+        
+        if self._history_tokens <= budget and len(self._history) <= max_msgs:
+            return
+        
+        ratio = self._config.trim_target_ratio
+        excess_tokens = self._history_tokens - int(budget * ratio)
+        excess_msgs = len(self._history) - int(max_msgs * ratio)
+        
+        # Find how many messages (after system prompt and summary) to drop
+        start = self._first_turn_index()
+        last = self._current_turn_index()
+        drop = 0
+        dropped_tokens = 0
+        while start + drop < last and (dropped_tokens < excess_tokens or drop < excess_msgs):
+            dropped_tokens += self._token_counts[start + drop]
+            drop += 1
+        
+        # Don't leave orphan assistant/tool messages at the start
+        while start + drop < last and self._history[start + drop]['role'] != 'user':
+            dropped_tokens += self._token_counts[start + drop]
+            drop += 1
+        
+        if drop:
+            del self._history[start:start + drop]
+            del self._token_counts[start:start + drop]
+            self._history_tokens -= dropped_tokens
+        
+        shrunk = self._history_tokens > budget and self._shrink_turn_results(
+            self._current_turn_index(), self._history_tokens - budget
+        )
+        if drop or shrunk:
+            self._persist_snapshot()
+    
+    def _current_turn_index(self) -> int:
+        """Index of the last user message (the latest message if none)."""
+        for index in range(len(self._history) - 1, 0, -1):
+            if self._history[index]['role'] == 'user':
+                return index
+        return len(self._history) - 1
+    
+    def _shrink_turn_results(self, start: int, excess: int) -> bool:
+        """
+        Truncate the tool results of the current turn to free tokens.
+        
+        The results share what is left of their tokens after `excess`
+        evenly, so a turn with many rounds stays within the budget
+        without losing its question or tool calls.
+        
+        Args:
+            start: Index of the current turn's user message.
+            excess: Tokens to free.
+        
+        Returns:
+            True if any result was truncated.
+        """
+        indexes = [
+            index for index in range(start, len(self._history))
+            if self._history[index]['role'] == 'tool'
+        ]
+        if not indexes:
+            return False
+        
+        available = sum(self._token_counts[i] for i in indexes) - excess
+        share = max(available // len(indexes), 0)
+        shrunk = False
+        for index in indexes:
+            if self._token_counts[index] <= share:
+                continue
+            message = dict(self._history[index])
+            content = message['content']
+            # Leave room for the message overhead and truncation marker
+            overhead = self._token_counts[index] - estimate_tokens(content)
+            marker = estimate_tokens(f"\n... [truncated {len(content)} characters]")
+            message['content'] = truncate_to_tokens(content, max(share - overhead - marker, 0))
+            tokens = estimate_message_tokens(message)
+            self._history[index] = message
+            self._history_tokens += tokens - self._token_counts[index]
+            self._token_counts[index] = tokens
+            shrunk = True
+        return shrunk
+    
+    def _first_turn_index(self) -> int:
+        """Index of the first conversation message (after prompt and summary)."""
+        if len(self._history) > 1 and self._is_summary(self._history[1]):
+            return 2
+        return 1
+    
+    @staticmethod
+    def _is_summary(message: Dict[str, Any]) -> bool:
+        """Check if a message is the rolling conversation summary."""
+        return (
+            message.get('role') == 'system'
+            and (message.get('content') or '').startswith(SUMMARY_PREFIX)
+        )
     
-    def chat_stream(self, user_message: str) -> Generator[str, None, str]:
+    def _schedule_compaction(self) -> None:
+        """Start background compaction if history passed the threshold."""
+        config = self._config
+        if not config.compaction_enabled:
+            return
+        if self._history_tokens <= self.token_budget * config.compaction_threshold:
+            return
+        if self._compaction_task and not self._compaction_task.done():
+            return
+        
+        try:
+            self._compaction_task = asyncio.get_running_loop().create_task(self._compact())
+        except RuntimeError:
+            # No running event loop (synchronous use): skip compaction
+            pass
+    
+    async def _compact(self) -> None:
+        """
+        Summarize older turns and replace them with a summary message.
+        
+        Runs off the request path. The latest `compaction_keep_messages`
+        messages (aligned to a user turn) are kept verbatim. If history
+        changed underneath (trim or reset) the summary is discarded.
+        """
+        # Keep at least the latest message, even with keep_messages = 0
+        end = min(len(self._history) - self._config.compaction_keep_messages, len(self._history) - 1)
+        while end > 1 and self._history[end]['role'] != 'user':
+            end -= 1
+        if end <= self._first_turn_index():
+            return
+        
+        block = self._history[1:end]
+        transcript = "\n".join(self._render_for_summary(msg) for msg in block)
+        
+        call = CallStats(kind=CALL_COMPACTION, model=self._config.compaction_model or self._config.model)
+        
+        def on_admitted(waited: float) -> None:
+            call.queue_wait = waited
+        
+        try:
+            response = await get_ollama_pool().chat({
+                'model': call.model,
+                'messages': [
+                    {'role': 'system', 'content': COMPACTION_PROMPT},
+                    {'role': 'user', 'content': transcript}
+                ],
+                'stream': False,
+                'keep_alive': self._config.keep_alive,
+                'options': {'num_ctx': self._config.context_window}
+            }, affinity_key=self._session_id, priority=PRIORITY_BATCH, on_admitted=on_admitted)
+            call.update_from(response)
+            self._record_call(call)
+            summary = (response['message']['content'] or '').strip()
+        except Exception as e:
+            print(f"[LLM] Compaction error: {e}")
+            return
+        
+        if not summary:
+            return
+        
+        # Make sure the summarized block is still in place
+        if len(self._history) <= end or not all(
+            self._history[1 + i] is msg for i, msg in enumerate(block)
+        ):
+            return
+        
+        summary_msg = {'role': 'system', 'content': SUMMARY_PREFIX + summary}
+        summary_tokens = estimate_message_tokens(summary_msg)
+        removed_tokens = sum(self._token_counts[1:end])
+        
+        self._history[1:end] = [summary_msg]
+        self._token_counts[1:end] = [summary_tokens]
+        self._history_tokens += summary_tokens - removed_tokens
+        self._persist_snapshot()
+        print(f"[LLM] Compacted {len(block)} messages "
+              f"({removed_tokens} -> {summary_tokens} tokens)")
+    
+    def _render_for_summary(self, message: Dict[str, Any]) -> str:
+        """Render a history message as a transcript line."""
+        role = message.get('role')
+        content = message.get('content') or ''
+        if self._is_summary(message):
+            return f"Previous summary: {content[len(SUMMARY_PREFIX):]}"
+        if role == 'user':
+            return f"User: {content}"
+        if role == 'tool':
+            return f"Tool {message.get('name', '')}: {content}"
+        if message.get('tool_calls'):
+            calls = ", ".join(
+                f"{call['function']['name']}({json.dumps(call['function'].get('arguments') or {}, ensure_ascii=False)})"
+                for call in message['tool_calls']
+            )
+            return f"Assistant called tools: {calls}"
+        return f"Assistant: {content}"
+    
+    async def _chat(self, kind: str, model: Optional[str] = None, **kwargs) -> AsyncGenerator[Any, None]:
+        """
+        Stream a chat request against Ollama.
+        
+        Generation statistics of the call (queue wait, time to first
+        token and Ollama's counters from the final chunk) are recorded
+        in the current turn. With `coalesce_requests`, identical
+        concurrent requests (same model, messages, tools and options)
+        are served by a single Ollama generation.
+        
+        Args:
+            kind: Kind of call, for statistics (CALL_*).
+            model: Model to use (default: the model of the current turn).
+            **kwargs: Extra arguments for AsyncClient.chat (e.g. tools).
+            
+        Yields:
+            Response chunks.
+        """
+        prompt_tokens = self._history_tokens
+        if kwargs.get('tools'):
+            prompt_tokens += estimate_tokens(json.dumps(kwargs['tools'], ensure_ascii=False))
+        
+        options = self._generation_options(kind)
+        options.update(kwargs.pop('options', None) or {})
+        
+        request = dict(
+            model=model or self._main_model(),
+            messages=list(self._history),
+            stream=True,
+            keep_alive=self._config.keep_alive,
+            options=options,
+            **kwargs
+        )
+        
+        call = CallStats(kind=kind, model=request['model'], prompt_tokens=prompt_tokens)
+        
+        def on_admitted(waited: float) -> None:
+            call.queue_wait = waited
+        
+        def open_stream() -> AsyncGenerator[Any, None]:
+            return get_ollama_pool().stream(
+                request,
+                affinity_key=self._session_id,
+                priority=self.priority,
+                on_position=self.on_queue_position,
+                on_admitted=on_admitted
+            )
+        
+        if self._config.coalesce_requests:
+            # Identical in-flight requests share one generation
+            flights = get_llm_flights()
+            key = request_key(request)
+            call.coalesced = flights.running(key)
+            chunks = flights.stream(key, open_stream)
+        else:
+            chunks = open_stream()
+        
+        start = time.perf_counter()
+        try:
+            async for chunk in chunks:
+                if call.first_token is None:
+                    call.first_token = time.perf_counter() - start
+                    # A joined flight replays cached chunks: not a latency sample
+                    if call.model == self._config.model and not call.coalesced:
+                        get_load_monitor().record_latency(call.first_token)
+                if chunk.get('done'):
+                    call.update_from(chunk)
+                yield chunk
+        finally:
+            # Also record calls stopped early or interrupted
+            if call.first_token is not None:
+                self._record_call(call)
+    
+    def _main_model(self) -> str:
+        """Model answering the current turn."""
+        if self._degraded and self._config.fallback_model:
+            return self._config.fallback_model
+        return self._config.model
+    
+    def _generation_options(self, kind: str) -> Dict[str, Any]:
+        """
+        Ollama options of this session's chat calls.
+        
+        `num_predict` is only sent with answer calls: tool decisions of
+        a reasoning model may think for a long time before calling a
+        tool, and cutting them short leaves the turn without an answer.
+        Their forwarded answer is capped in `chat_with_tools` instead.
+        
+        Args:
+            kind: Kind of call (CALL_*).
+            
+        Returns:
+            Options for the request.
+        """
+        options: Dict[str, Any] = {'num_ctx': self._config.context_window}
+        
+        if kind in (CALL_ANSWER, CALL_FINAL):
+            options['num_predict'] = self._num_predict()
+        
+        if self._config.stop:
+            options['stop'] = list(self._config.stop)
+        return options
+    
+    def _num_predict(self) -> int:
+        """Generated tokens cap of the current turn's answer."""
+        if self._degraded and self._config.degraded_num_predict:
+            return self._config.degraded_num_predict
+        return self._config.num_predict
+    
+    def _answer_budget(self) -> AnswerBudget:
+        """Create the spoken answer budget for one response."""
+        return AnswerBudget(self._config.max_answer_words, self._config.max_answer_sentences)
+    
+    async def _answer_tokens(self, kind: str) -> AsyncGenerator[str, None]:
+        """
+        Stream the content tokens of an answer without tools.
+        
+        Once the answer budget is reached the Ollama stream is closed,
+        which aborts the generation on the backend.
+        
+        Args:
+            kind: Kind of call, for statistics (CALL_ANSWER or CALL_FINAL).
+            
+        Yields:
+            Response tokens.
+        """
+        budget = self._answer_budget()
+        text = ""
+        
+        async with aclosing(self._chat(kind)) as chunks:
+            async for chunk in chunks:
+                token = chunk['message']['content'] or ""
+                if budget.exhausted(text, token):
+                    print(f"[LLM] Answer budget reached ({len(text.split())} words)")
+                    break
+                text += token
+                yield token
+    
+    def _begin_turn(self) -> None:
+        """Pick the turn mode (normal/degraded) and start its statistics."""
+        self._degraded = get_load_monitor().begin_turn()
+        self._turns.append({
+            'degraded': self._degraded,
+            'calls': []
+        })
+    
+    def _record_call(self, call: CallStats) -> None:
+        """
+        Record the statistics of one Ollama call.
+        
+        Turn calls are added to the current turn; all calls go into the
+        session aggregates, and all but coalesced ones (whose generation
+        is recorded by the session that started it) into the global
+        (per model) aggregates.
+        
+        Args:
+            call: Call statistics.
+        """
+        if call.kind != CALL_COMPACTION and self._turns:
+            self._turns[-1]['calls'].append(call)
+        self._stats.setdefault(call.kind, StatsAggregate()).add(call)
+        if not call.coalesced:
+            get_llm_stats().record(call)
+    
+    @staticmethod
+    def _summarize_turn(turn: Dict[str, Any]) -> Dict[str, Any]:
+        """Serializable statistics of one turn, with totals over its calls."""
+        totals = StatsAggregate()
+        for call in turn['calls']:
+            totals.add(call)
+        return {
+            'degraded': turn['degraded'],
+            'calls': [call.to_dict() for call in turn['calls']],
+            'totals': totals.summary['totals']
+        }
+    
+    @property
+    def turn_stats(self) -> Optional[Dict[str, Any]]:
+        """Generation statistics of the current (or last) turn."""
+        if not self._turns:
+            return None
+        return self._summarize_turn(self._turns[-1])
+    
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """
+        Generation statistics of this session.
+        
+        Returns:
+            Aggregates per call kind and the statistics of recent turns.
+        """
+        total = StatsAggregate()
+        for aggregate in self._stats.values():
+            total.merge(aggregate)
+        return {
+            'total': total.summary,
+            'by_kind': {kind: agg.summary for kind, agg in self._stats.items()},
+            'turns': [self._summarize_turn(turn) for turn in self._turns]
+        }
+    
+    @property
+    def prefill_metrics(self) -> Dict[str, Any]:
+        """
+        Prompt-eval metrics of recent turns.
+        
+        `cache_reuse` is the estimated share of prompt tokens served from
+        Ollama's prompt cache (1 - evaluated / sent).
+        """
+        calls = [call for turn in self._turns for call in turn['calls'] if call.completed]
+        sent = sum(call.prompt_tokens for call in calls)
+        evaluated = sum(call.prompt_eval_count for call in calls)
+        return {
+            'calls': len(calls),
+            'prompt_tokens': sent,
+            'prompt_eval_count': evaluated,
+            'cache_reuse': round(max(0.0, 1 - evaluated / sent), 3) if sent else None
+        }
+    
+    async def chat_stream(self, user_message: str) -> AsyncGenerator[str, None]:
         """
         Send message and return streaming response (without tools).
         
@@ -120,41 +850,38 @@ class LLMEngine:
             
         Yields:
             Response tokens.
-            
-        Returns:
-            Complete response at the end.
         """
         if not user_message or len(user_message) < 2:
-            return ""
+            return
         
         # Add user message
         self.add_user_message(user_message)
+        self._begin_turn()
         
         # Get streaming response
         full_response = ""
         
         try:
-            stream = ollama.chat(
-                model=self._config.model,
-                messages=self._history,
-                stream=True
-            )
-            
-            for chunk in stream:
-                token = chunk['message']['content']
-                full_response += token
-                yield token
+            async with aclosing(self._answer_tokens(CALL_ANSWER)) as tokens:
+                async for token in tokens:
+                    full_response += token
+                    yield token
             
             # Save complete response
             if full_response.strip():
                 self.add_assistant_message(full_response)
                 
+        except (asyncio.CancelledError, GeneratorExit):
+            # Cancelled turn, or generator closed by the consumer
+            self._save_interrupted(full_response)
+            raise
+        except QueueFullError:
+            self._rollback_turn()
+            raise
         except Exception as e:
             error_msg = f"Ollama error: {e}"
             print(f"[LLM] {error_msg}")
             yield f"\n[Error: {error_msg}]"
-        
-        return full_response
     
     async def chat_with_tools(
         self, 
@@ -165,11 +892,22 @@ class LLMEngine:
         """
         Chat with Tool Calling support.
         
-        The flow is:
-        1. Send message with available tools to LLM
-        2. If LLM requests a tool, execute it
-        3. Send tool result to LLM
-        4. LLM generates final response
+        The flow is an agentic loop, bounded by `max_rounds` and
+        `turn_timeout` (see ToolsConfig):
+        1. Stream history with available tools to LLM, forwarding
+           content tokens as they arrive
+        2. If LLM requests tools, execute them concurrently
+        3. Add tool results to history and go back to 1
+        4. When LLM answers without tools, that is the final response
+        
+        If the budget runs out, the final response is generated
+        without tools from the results gathered so far.
+        
+        With a `router_model` configured (model cascade), steps 1-3 run
+        on the small router model and its text is not forwarded; the
+        final response is then streamed by the main model. A turn that
+        needs no tool is answered by the router itself when
+        `router_direct_answers` is set.
         
         Args:
             user_message: User message.
@@ -184,89 +922,155 @@ class LLMEngine:
         
         # Add user message
         self.add_user_message(user_message)
+        self._begin_turn()
         
         # If no tools enabled, use normal chat
         if not self.tools_enabled:
-            for token in self._stream_simple():
-                yield token
+            try:
+                async with aclosing(self._stream_simple()) as tokens:
+                    async for token in tokens:
+                        yield token
+            except QueueFullError:
+                self._rollback_turn()
+                raise
             return
         
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self._tools_config.turn_timeout
+        router = self._config.router_model
+        content = ""
+        forward = True
+        pending: List[str] = []
+        
         try:
-            # First call: LLM decides whether to use tools
-            tools_list = self._tool_registry.get_ollama_tools()
-            
-            response = ollama.chat(
-                model=self._config.model,
-                messages=self._history,
-                tools=tools_list,
-                stream=False  # No streaming on first call with tools
-            )
-            
-            message = response['message']
+            # Only the tools relevant to this message (all if few)
+            tools_list = self._tool_registry.select_tools(user_message)
             
-            # Check if LLM wants to use tools
-            tool_calls = message.get('tool_calls', [])
-            
-            if tool_calls:
+            for round_num in range(self._tools_config.max_rounds):
+                if loop.time() >= deadline:
+                    print("[LLM] Tool loop time budget exhausted")
+                    break
+                
+                # LLM decides whether to use (more) tools. The call is
+                # streamed: content tokens are forwarded immediately and
+                # tool calls are collected as they arrive. The router's
+                # text is only forwarded when it may be the answer.
+                content = ""
+                tool_calls = []
+                forward = not router or (self._config.router_direct_answers and round_num == 0)
+                
+                budget = self._answer_budget()
+                max_tokens = self._num_predict()
+                forwarded = 0
+                
+                async with aclosing(self._chat(CALL_TOOL_DECISION, model=router or None, tools=tools_list)) as chunks:
+                    async for chunk in chunks:
+                        message = chunk['message']
+                        if message.get('tool_calls'):
+                            tool_calls.extend(message['tool_calls'])
+                        token = message.get('content') or ""
+                        if not token:
+                            continue
+                        if forward and not tool_calls:
+                            if budget.exhausted(content, token):
+                                print(f"[LLM] Answer budget reached ({len(content.split())} words)")
+                                break
+                            # Ollama streams one token per chunk
+                            if 0 < max_tokens <= forwarded:
+                                print(f"[LLM] num_predict reached ({forwarded} tokens)")
+                                break
+                            forwarded += 1
+                        content += token
+                        if forward:
+                            yield token
+                
+                if not tool_calls:
+                    if not forward:
+                        # Router is done with tools: main model answers
+                        content = ""
+                        break
+                    # Direct response without (more) tools
+                    if content.strip():
+                        self.add_assistant_message(content)
+                    return
+                
+                calls = [
+                    {
+                        'function': {
+                            'name': call['function']['name'],
+                            'arguments': call['function'].get('arguments') or {}
+                        }
+                    }
+                    for call in tool_calls
+                ]
+                
                 # Add assistant response with tool_calls to history
-                self._history.append(message)
+                self.add_tool_calls(content, calls)
+                content = ""
+                pending = [call['function']['name'] for call in calls]
                 
-                # Execute each requested tool
-                for tool_call in tool_calls:
-                    tool_name = tool_call['function']['name']
-                    tool_args = tool_call['function'].get('arguments', {})
-                    
-                    # Notify tool start
+                for call in calls:
+                    tool_name = call['function']['name']
                     if on_tool_start:
                         on_tool_start(tool_name)
-                    
                     yield f"[Executing: {tool_name}...]\n"
-                    
-                    # Execute tool
-                    result = await self._tool_registry.execute_tool(tool_name, tool_args)
-                    
-                    # Notify tool end
+                
+                # Independent calls of the same round run concurrently
+                timeout = min(self._tools_config.tool_timeout, max(deadline - loop.time(), 0.1))
+                results = await self._tool_registry.execute_tools(
+                    [(call['function']['name'], call['function']['arguments']) for call in calls],
+                    timeout=timeout
+                )
+                
+                pending = []
+                for call, result in zip(calls, results):
+                    tool_name = call['function']['name']
                     if on_tool_end:
                         on_tool_end(tool_name, result)
-                    
-                    # Add result to history
                     self.add_tool_result(tool_name, result)
-                    print(f"[LLM] Tool {tool_name} executed")
                 
-                # Second call: LLM processes results and generates response
-                async for token in self._stream_final_response():
+                print(f"[LLM] Round {round_num + 1}: executed {len(calls)} tools")
+            
+            # Router finished or budget exhausted: answer with the
+            # results gathered so far
+            async with aclosing(self._stream_final_response()) as tokens:
+                async for token in tokens:
                     yield token
-            else:
-                # Direct response without tools
-                content = message.get('content', '')
-                if content:
-                    self.add_assistant_message(content)
-                    yield content
                     
+        except (asyncio.CancelledError, GeneratorExit):
+            # Keep history consistent: every tool call gets a result
+            for tool_name in pending:
+                self.add_tool_result(tool_name, "Cancelled: the user interrupted.")
+            if not pending:
+                self._save_interrupted(content if forward else "")
+            raise
+        except QueueFullError:
+            self._rollback_turn()
+            raise
         except Exception as e:
             error_msg = f"Error in chat_with_tools: {e}"
             print(f"[LLM] {error_msg}")
             yield f"[Error: {error_msg}]"
     
-    def _stream_simple(self) -> Generator[str, None, None]:
+    async def _stream_simple(self) -> AsyncGenerator[str, None]:
         """Simple streaming without tools."""
         full_response = ""
         
         try:
-            stream = ollama.chat(
-                model=self._config.model,
-                messages=self._history,
-                stream=True
-            )
-            
-            for chunk in stream:
-                token = chunk['message']['content']
-                full_response += token
-                yield token
+            async with aclosing(self._answer_tokens(CALL_ANSWER)) as tokens:
+                async for token in tokens:
+                    full_response += token
+                    yield token
             
             if full_response.strip():
                 self.add_assistant_message(full_response)
                 
+        except (asyncio.CancelledError, GeneratorExit):
+            # Cancelled turn, or generator closed by the consumer
+            self._save_interrupted(full_response)
+            raise
+        except QueueFullError:
+            raise
         except Exception as e:
             yield f"[Error: {e}]"
     
@@ -279,26 +1083,24 @@ class LLMEngine:
         
         try:
             # Use streaming for final response
-            stream = ollama.chat(
-                model=self._config.model,
-                messages=self._history,
-                stream=True
-            )
-            
-            for chunk in stream:
-                token = chunk['message']['content']
-                full_response += token
-                yield token
-                # Small delay to allow async to work
-                await asyncio.sleep(0)
+            async with aclosing(self._answer_tokens(CALL_FINAL)) as tokens:
+                async for token in tokens:
+                    full_response += token
+                    yield token
             
             if full_response.strip():
                 self.add_assistant_message(full_response)
                 
+        except (asyncio.CancelledError, GeneratorExit):
+            # Cancelled turn, or generator closed by the consumer
+            self._save_interrupted(full_response)
+            raise
+        except QueueFullError:
+            raise
         except Exception as e:
             yield f"[Error generating response: {e}]"
     
-    def chat(self, user_message: str) -> str:
+    async def chat(self, user_message: str) -> str:
         """
         Send message and return complete response (non-streaming).
         
@@ -309,22 +1111,71 @@ class LLMEngine:
             Complete assistant response.
         """
         response = ""
-        for token in self.chat_stream(user_message):
+        async for token in self.chat_stream(user_message):
             response += token
         return response
     
     def reset(self) -> None:
         """Reset conversation history."""
         self._reset_history()
+        self._persist_snapshot()
         print("[LLM] History reset")
     
     def get_history(self) -> List[Dict[str, Any]]:
         """Return copy of current history."""
         return self._history.copy()
     
+    def set_priority(self, name: str) -> None:
+        """
+        Set the admission priority of this session.
+        
+        Args:
+            name: 'voice', 'text' or 'batch'.
+        """
+        self.priority = PRIORITIES.get(name, PRIORITY_TEXT)
+    
+    @property
+    def settings(self) -> Dict[str, Any]:
+        """Current generation settings of this session."""
+        return {key: getattr(self._config, key) for key in SESSION_SETTINGS}
+    
+    def update_settings(self, settings: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Override generation settings for this session.
+        
+        Nothing is applied if any value is invalid. `num_ctx` is not
+        overridable: a different context size makes Ollama reload the model.
+        
+        Args:
+            settings: New values for keys of SESSION_SETTINGS.
+            
+        Returns:
+            Current settings after the update.
+            
+        Raises:
+            ValueError: If a key is unknown or a value has the wrong type.
+        """
+        updates = {}
+        for key, value in settings.items():
+            kind = SESSION_SETTINGS.get(key)
+            if kind is None:
+                raise ValueError(f"Unknown setting: {key}")
+            if kind is int:
+                if isinstance(value, bool) or not isinstance(value, int):
+                    raise ValueError(f"Setting {key} must be an integer")
+            elif not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+                raise ValueError(f"Setting {key} must be a list of strings")
+            updates[key] = list(value) if kind is list else value
+        
+        for key, value in updates.items():
+            setattr(self._config, key, value)
+        if updates:
+            print(f"[LLM] Session settings updated: {updates}")
+        return self.settings
+    
     def set_model(self, model_name: str) -> None:
         """
-        Change Ollama model.
+        Change Ollama model for this session.
         
         Args:
             model_name: Model name (e.g., 'gpt-oss:20b')
@@ -334,23 +1185,24 @@ class LLMEngine:
     
     def set_system_prompt(self, prompt: str) -> None:
         """
-        Change system prompt and reset history.
+        Change this session's system prompt and reset history.
         
         Args:
             prompt: New system prompt.
         """
         self._config.system_prompt = prompt
         self._reset_history()
+        self._persist_snapshot()
         print("[LLM] System prompt updated")
 
 
 # Singleton instance
-_llm_engine: Optional[LLMEngine] = None
+_llm_flights: Optional[SingleFlight] = None
 
 
-def get_llm_engine() -> LLMEngine:
-    """Get LLM engine instance (singleton)."""
-    global _llm_engine
-    if _llm_engine is None:
-        _llm_engine = LLMEngine()
-    return _llm_engine
+def get_llm_flights() -> SingleFlight:
+    """Get the shared single-flight group for Ollama requests (singleton)."""
+    global _llm_flights
+    if _llm_flights is None:
+        _llm_flights = SingleFlight()
+    return _llm_flights
@@ -0,0 +1,173 @@
+"""
+TAMARA LLM Statistics Module
+Generation statistics reported by Ollama, per call, session and model.
+"""
+
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional
+
+# Ollama reports durations in nanoseconds
+NS_PER_SECOND = 1_000_000_000
+
+# Kinds of LLM calls
+CALL_ANSWER = "answer"                # Answer without tools
+CALL_TOOL_DECISION = "tool_decision"  # Round of the tool loop (tools offered)
+CALL_FINAL = "final"                  # Answer written from tool results
+CALL_COMPACTION = "compaction"        # History summary
+
+
+@dataclass
+class CallStats:
+    """
+    Statistics of a single Ollama call.
+    
+    Durations are in seconds. `queue_wait` and `first_token` are measured
+    by TAMARA (the wait is unknown for calls coalesced into another
+    session's generation); the rest comes from Ollama's final chunk, so
+    it stays at zero when the call was stopped early.
+    
+    A `coalesced` call joined another session's generation: its counters
+    are that generation's, so it is left out of the global statistics.
+    """
+    kind: str
+    model: str
+    prompt_tokens: int = 0  # Estimated prompt size sent
+    queue_wait: Optional[float] = None
+    first_token: Optional[float] = None
+    prompt_eval_count: int = 0
+    prompt_eval_duration: float = 0.0
+    eval_count: int = 0
+    eval_duration: float = 0.0
+    load_duration: float = 0.0
+    total_duration: float = 0.0
+    completed: bool = False
+    coalesced: bool = False
+    
+    def update_from(self, response: Any) -> None:
+        """
+        Fill Ollama's counters from the final chunk (or full response).
+        
+        Args:
+            response: Chunk with `done` set, or a non-streaming response.
+        """
+        self.prompt_eval_count = response.get('prompt_eval_count') or 0
+        self.prompt_eval_duration = (response.get('prompt_eval_duration') or 0) / NS_PER_SECOND
+        self.eval_count = response.get('eval_count') or 0
+        self.eval_duration = (response.get('eval_duration') or 0) / NS_PER_SECOND
+        self.load_duration = (response.get('load_duration') or 0) / NS_PER_SECOND
+        self.total_duration = (response.get('total_duration') or 0) / NS_PER_SECOND
+        self.completed = True
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializable form (durations rounded to milliseconds)."""
+        data = asdict(self)
+        for key, value in data.items():
+            if isinstance(value, float):
+                data[key] = round(value, 3)
+        return data
+
+
+class StatsAggregate:
+    """
+    Running totals over a set of calls.
+    
+    Attributes:
+        calls: Number of calls added.
+        totals: Sum of each counter over those calls.
+    """
+    
+    FIELDS = (
+        'queue_wait', 'first_token', 'prompt_tokens',
+        'prompt_eval_count', 'prompt_eval_duration',
+        'eval_count', 'eval_duration',
+        'load_duration', 'total_duration',
+    )
+    
+    def __init__(self):
+        self.calls = 0
+        self.totals: Dict[str, float] = dict.fromkeys(self.FIELDS, 0)
+    
+    def add(self, call: CallStats) -> None:
+        """Add a call to the totals."""
+        self.calls += 1
+        for name in self.FIELDS:
+            self.totals[name] += getattr(call, name) or 0
+    
+    def merge(self, other: "StatsAggregate") -> None:
+        """Add the totals of another aggregate."""
+        self.calls += other.calls
+        for name, value in other.totals.items():
+            self.totals[name] += value
+    
+    @property
+    def summary(self) -> Dict[str, Any]:
+        """
+        Totals, per-call averages and throughput.
+        
+        `prefill_tps` / `decode_tps` are Ollama's prompt-eval and eval
+        speeds in tokens per second; comparing `queue_wait`,
+        `prompt_eval_duration` and `eval_duration` shows where the
+        latency goes.
+        """
+        totals = self.totals
+        prefill_time = totals['prompt_eval_duration']
+        decode_time = totals['eval_duration']
+        return {
+            'calls': self.calls,
+            'totals': {name: round(value, 3) for name, value in totals.items()},
+            'averages': {
+                name: round(value / self.calls, 3) if self.calls else None
+                for name, value in totals.items()
+            },
+            'prefill_tps': round(totals['prompt_eval_count'] / prefill_time, 1) if prefill_time else None,
+            'decode_tps': round(totals['eval_count'] / decode_time, 1) if decode_time else None,
+        }
+
+
+class LLMStats:
+    """
+    Process-wide generation statistics, per model and per call kind.
+    
+    Attributes:
+        _total: All calls.
+        _by_model: Calls per model.
+        _by_kind: Calls per kind (CALL_*).
+    """
+    
+    def __init__(self):
+        self._total = StatsAggregate()
+        self._by_model: Dict[str, StatsAggregate] = defaultdict(StatsAggregate)
+        self._by_kind: Dict[str, StatsAggregate] = defaultdict(StatsAggregate)
+    
+    def record(self, call: CallStats) -> None:
+        """
+        Record a finished call.
+        
+        Args:
+            call: Call statistics.
+        """
+        self._total.add(call)
+        self._by_model[call.model].add(call)
+        self._by_kind[call.kind].add(call)
+    
+    @property
+    def summary(self) -> Dict[str, Any]:
+        """Statistics for the stats API."""
+        return {
+            'total': self._total.summary,
+            'by_model': {model: agg.summary for model, agg in self._by_model.items()},
+            'by_kind': {kind: agg.summary for kind, agg in self._by_kind.items()},
+        }
+
+
+# Singleton instance
+_llm_stats: Optional[LLMStats] = None
+
+
+def get_llm_stats() -> LLMStats:
+    """Get global LLM statistics instance (singleton)."""
+    global _llm_stats
+    if _llm_stats is None:
+        _llm_stats = LLMStats()
+    return _llm_stats
@@ -0,0 +1,150 @@
+"""
+TAMARA Load Monitor Module
+Switches new turns to a cheaper configuration while Ollama is saturated.
+"""
+
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from .config import get_config
+from .ollama_pool import get_ollama_pool
+
+
+class LoadMonitor:
+    """
+    Load-adaptive degradation of LLM turns.
+    
+    Load is measured by the wait queue per healthy backend and by the
+    recent time to first token of the primary model (queue wait
+    included). When either goes over its `degrade_*` threshold, new
+    turns are served in degraded mode (`fallback_model` and/or
+    `degraded_num_predict`); normal mode comes back only once both are
+    under the lower `recover_*` thresholds, so the mode doesn't flap.
+    
+    The decision is taken once per turn: a conversation never changes
+    model in the middle of a turn.
+    
+    Attributes:
+        _config: LLM configuration.
+        _latencies: Recent (timestamp, seconds) first-token samples.
+        _degraded: Whether new turns are currently degraded.
+        _since: Timestamp of the last mode switch.
+        _switches: Number of mode switches.
+        _turns: Turns started, per mode.
+    """
+    
+    def __init__(self):
+        self._config = get_config().llm
+        self._latencies: Deque[Tuple[float, float]] = deque()
+        self._degraded = False
+        self._since = time.time()
+        self._switches = 0
+        self._turns = {"normal": 0, "degraded": 0}
+    
+    @property
+    def enabled(self) -> bool:
+        """Indicates if a degraded configuration is defined."""
+        return bool(self._config.fallback_model or self._config.degraded_num_predict)
+    
+    def record_latency(self, seconds: float) -> None:
+        """
+        Record the time to first token of a primary model call.
+        
+        Args:
+            seconds: Time from request to first chunk, queue included.
+        """
+        self._latencies.append((time.monotonic(), seconds))
+    
+    def _recent_latency(self) -> Optional[float]:
+        """Average first-token latency within `latency_window`, if any."""
+        horizon = time.monotonic() - self._config.latency_window
+        while self._latencies and self._latencies[0][0] < horizon:
+            self._latencies.popleft()
+        if not self._latencies:
+            return None
+        return sum(seconds for _, seconds in self._latencies) / len(self._latencies)
+    
+    @staticmethod
+    def _queue_depth() -> float:
+        """Waiting requests per healthy backend."""
+        backends = [b for b in get_ollama_pool().backends if b.healthy]
+        if not backends:
+            return 0.0
+        return sum(b.admission.queued for b in backends) / len(backends)
+    
+    def _evaluate(self) -> bool:
+        """
+        Update the mode from the current load (with hysteresis).
+        
+        Returns:
+            True if new turns should be degraded.
+        """
+        config = self._config
+        depth = self._queue_depth()
+        latency = self._recent_latency()
+        
+        if not self._degraded:
+            overloaded = (
+                depth >= config.degrade_queue_depth
+                or (latency is not None and latency >= config.degrade_latency)
+            )
+            if overloaded:
+                self._switch(True, depth, latency)
+        else:
+            recovered = (
+                depth <= config.recover_queue_depth
+                and (latency is None or latency <= config.recover_latency)
+            )
+            if recovered:
+                self._switch(False, depth, latency)
+        
+        return self._degraded
+    
+    def _switch(self, degraded: bool, depth: float, latency: Optional[float]) -> None:
+        """Change mode and log the reason."""
+        self._degraded = degraded
+        self._since = time.time()
+        self._switches += 1
+        latency_text = f"{latency:.1f}s" if latency is not None else "n/a"
+        mode = "degraded" if degraded else "normal"
+        print(f"[Load] Switching to {mode} mode "
+              f"(queue {depth:.1f}/backend, first token {latency_text})")
+    
+    def begin_turn(self) -> bool:
+        """
+        Decide the mode of a new turn.
+        
+        Returns:
+            True if the turn must use the degraded configuration.
+        """
+        degraded = self.enabled and self._evaluate()
+        self._turns["degraded" if degraded else "normal"] += 1
+        return degraded
+    
+    @property
+    def status(self) -> Dict[str, Any]:
+        """Load and degradation state for the status API."""
+        latency = self._recent_latency()
+        return {
+            "enabled": self.enabled,
+            "degraded": self._degraded,
+            "since": self._since,
+            "switches": self._switches,
+            "queue_depth": round(self._queue_depth(), 2),
+            "first_token_latency": round(latency, 3) if latency is not None else None,
+            "turns": dict(self._turns),
+            "fallback_model": self._config.fallback_model or None,
+        }
+
+
+# Singleton instance
+_load_monitor: Optional[LoadMonitor] = None
+
+
+def get_load_monitor() -> LoadMonitor:
+    """Get load monitor instance (singleton)."""
+    global _load_monitor
+    if _load_monitor is None:
+        _load_monitor = LoadMonitor()
+    return _load_monitor
@@ -0,0 +1,144 @@
+"""
+TAMARA Model Warm-up Module
+Loads the Ollama model at startup and keeps it resident.
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, Optional
+
+from .admission import PRIORITY_BATCH, QueueFullError
+from .config import get_config
+from .ollama_pool import OllamaBackend, get_ollama_pool
+
+
+class ModelWarmer:
+    """
+    Keeps the LLM models loaded in Ollama.
+    
+    A cold load of a large model takes tens of seconds, so the model is
+    warmed up at startup on every backend with a one-token generation
+    using the real system prompt (which also primes Ollama's prompt
+    cache), and then re-warmed every `keep_warm_interval` seconds.
+    The router model of the cascade, if any, is kept warm as well.
+    The model is ready when at least one backend is warm.
+    
+    Warm-up generations go through the backend's admission control at
+    batch priority, so they never exceed `max_concurrency`.
+    
+    Attributes:
+        _config: LLM configuration.
+        _ready: Whether the last warm-up succeeded.
+        _last_warmup: Timestamp of the last successful warm-up.
+        _last_duration: Duration of the last warm-up, in seconds.
+        _last_error: Error of the last failed warm-up.
+    """
+    
+    def __init__(self):
+        self._config = get_config().llm
+        self._ready = False
+        self._last_warmup: Optional[float] = None
+        self._last_duration: Optional[float] = None
+        self._last_error: Optional[str] = None
+    
+    @property
+    def is_ready(self) -> bool:
+        """Indicates if the model is loaded and answering."""
+        return self._ready
+    
+    @property
+    def status(self) -> Dict[str, Any]:
+        """Warm-up status for the status API."""
+        return {
+            "ready": self._ready,
+            "last_warmup": self._last_warmup,
+            "last_duration": self._last_duration,
+            "last_error": self._last_error,
+        }
+    
+    async def warm_up(self) -> bool:
+        """
+        Run a tiny generation on every backend to load the models.
+        
+        Returns:
+            True if at least one backend answered, False otherwise.
+        """
+        start = time.perf_counter()
+        backends = get_ollama_pool().backends
+        results = await asyncio.gather(*(self._warm_backend(b) for b in backends))
+        
+        self._ready = any(results)
+        if all(results):
+            self._last_error = None
+        if self._ready:
+            self._last_warmup = time.time()
+            self._last_duration = round(time.perf_counter() - start, 3)
+            print(f"[LLM] Model {self._config.model} warm on "
+                  f"{sum(results)}/{len(backends)} backends ({self._last_duration}s)")
+        return self._ready
+    
+    async def _warm_backend(self, backend: OllamaBackend) -> bool:
+        """
+        Warm up the models on a single backend.
+        
+        Args:
+            backend: Backend to warm up.
+            
+        Returns:
+            True if the backend answered.
+        """
+        config = self._config
+        models = [config.model]
+        if config.router_model:
+            models.append(config.router_model)
+        
+        for model in models:
+            try:
+                async with backend.admission.slot(PRIORITY_BATCH):
+                    await backend.client.chat(
+                        model=model,
+                        messages=[
+                            {'role': 'system', 'content': config.system_prompt},
+                            {'role': 'user', 'content': 'Hola'}
+                        ],
+                        stream=False,
+                        # Same num_ctx as real calls, or Ollama reloads the model
+                        options={'num_ctx': config.context_window, 'num_predict': 1},
+                        keep_alive=config.keep_alive
+                    )
+            except QueueFullError:
+                # Saturated by real traffic, so the model is loaded anyway
+                print(f"[LLM] Warm-up of {model} skipped on {backend.name}: queue full")
+                continue
+            except Exception as e:
+                backend.mark_failed(e)
+                self._last_error = f"{backend.name}: {e}"
+                print(f"[LLM] Warm-up failed for {model} on {backend.name}: {e}")
+                return False
+        
+        backend.mark_ok()
+        return True
+    
+    async def run(self) -> None:
+        """Warm up at startup, then keep the model warm (runs until cancelled)."""
+        if not self._config.warmup_enabled:
+            return
+        
+        await self.warm_up()
+        
+        interval = self._config.keep_warm_interval
+        while interval > 0:
+            await asyncio.sleep(interval)
+            await self.warm_up()
+
+
+# Singleton instance
+_model_warmer: Optional[ModelWarmer] = None
+
+
+def get_model_warmer() -> ModelWarmer:
+    """Get model warmer instance (singleton)."""
+    global _model_warmer
+    if _model_warmer is None:
+        _model_warmer = ModelWarmer()
+    return _model_warmer
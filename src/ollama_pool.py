@@ -0,0 +1,329 @@
+"""
+TAMARA Ollama Pool Module
+Routes LLM requests across several Ollama backends.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, AsyncGenerator, Callable, Dict, List, Optional, Set
+
+import httpx
+import ollama
+
+from .admission import AdmissionController, PositionCallback, PRIORITY_TEXT, QueueFullError
+from .config import get_config
+
+
+# Maximum number of session -> backend affinity entries kept
+MAX_AFFINITY_ENTRIES = 10000
+
+
+class BackendUnavailableError(Exception):
+    """No Ollama backend could serve the request."""
+    pass
+
+
+def _is_backend_failure(error: Exception) -> bool:
+    """Check if an error means the backend (not the request) failed."""
+    if isinstance(error, (ConnectionError, httpx.TransportError)):
+        return True
+    if isinstance(error, ollama.ResponseError):
+        return error.status_code >= 500
+    return False
+
+
+@dataclass
+class OllamaBackend:
+    """
+    A single Ollama server.
+    
+    Attributes:
+        host: Base URL (None = ollama default / OLLAMA_HOST).
+        client: Async client bound to the host.
+        admission: Concurrency limit and wait queue of the backend.
+        outstanding: Requests routed here and not finished (running or queued).
+        healthy: Result of the last request or health probe.
+        total_requests: Requests routed to this backend.
+        failures: Consecutive failures.
+        last_error: Last failure message.
+        last_check: Timestamp of the last health probe.
+    """
+    host: Optional[str]
+    client: ollama.AsyncClient
+    admission: AdmissionController
+    outstanding: int = 0
+    healthy: bool = True
+    total_requests: int = 0
+    failures: int = 0
+    last_error: Optional[str] = None
+    last_check: Optional[float] = None
+    
+    @property
+    def name(self) -> str:
+        """Display name of the backend."""
+        return self.host or "default"
+    
+    def mark_ok(self) -> None:
+        """Record a successful request or probe."""
+        self.healthy = True
+        self.failures = 0
+        self.last_error = None
+    
+    def mark_failed(self, error: Exception) -> None:
+        """Record a failed request or probe."""
+        self.healthy = False
+        self.failures += 1
+        self.last_error = str(error)
+    
+    @property
+    def status(self) -> Dict[str, Any]:
+        """Backend status for the status API."""
+        return {
+            "host": self.name,
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "active": self.admission.active,
+            "queued": self.admission.queued,
+            "rejected": self.admission.rejected,
+            "total_requests": self.total_requests,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "last_check": self.last_check,
+        }
+
+
+class OllamaPool:
+    """
+    Pool of Ollama backends.
+    
+    Routing policy:
+    1. Only healthy backends whose wait queue is not full are candidates
+       (all non-full ones if none is healthy).
+    2. A session sticks to its previous backend so its prompt cache stays
+       warm, unless that backend has `affinity_slack` more outstanding
+       requests than the least loaded one.
+    3. Otherwise, the backend with the fewest outstanding requests wins.
+    
+    A request that fails before producing any output is retried on the
+    next backend (failover). Unhealthy backends come back once a health
+    probe succeeds. Each backend runs at most `max_concurrency`
+    generations; the rest wait in its priority queue (see admission).
+    
+    Example:
+        pool = get_ollama_pool()
+        async for chunk in pool.stream(request, affinity_key=session_id):
+            ...
+    """
+    
+    def __init__(self):
+        self._config = get_config().llm
+        hosts = self._config.endpoints or [None]
+        self._backends: List[OllamaBackend] = [
+            OllamaBackend(
+                host=host,
+                client=ollama.AsyncClient(host=host),
+                admission=AdmissionController(
+                    self._config.max_concurrency,
+                    self._config.max_queue
+                )
+            )
+            for host in hosts
+        ]
+        self._affinity: "OrderedDict[str, OllamaBackend]" = OrderedDict()
+    
+    @property
+    def backends(self) -> List[OllamaBackend]:
+        """All configured backends."""
+        return list(self._backends)
+    
+    @property
+    def status(self) -> List[Dict[str, Any]]:
+        """Status of every backend."""
+        return [backend.status for backend in self._backends]
+    
+    def select(self, affinity_key: Optional[str] = None,
+               exclude: Optional[Set[str]] = None) -> OllamaBackend:
+        """
+        Pick a backend for a request.
+        
+        Args:
+            affinity_key: Key to keep on the same backend (session id).
+            exclude: Backend names already tried for this request.
+            
+        Returns:
+            Selected backend.
+            
+        Raises:
+            BackendUnavailableError: If every backend was excluded.
+            QueueFullError: If every remaining backend is saturated.
+        """
+        exclude = exclude or set()
+        candidates = [b for b in self._backends if b.name not in exclude]
+        if not candidates:
+            raise BackendUnavailableError("All Ollama backends failed")
+        
+        candidates = [b for b in candidates if not b.admission.is_full]
+        if not candidates:
+            raise QueueFullError("Server busy, please try again")
+        
+        healthy = [b for b in candidates if b.healthy]
+        candidates = healthy or candidates
+        least = min(candidates, key=lambda b: (b.outstanding, b.total_requests))
+        
+        selected = least
+        if affinity_key:
+            previous = self._affinity.get(affinity_key)
+            if (previous in candidates
+                    and previous.outstanding <= least.outstanding + self._config.affinity_slack):
+                selected = previous
+            self._affinity[affinity_key] = selected
+            self._affinity.move_to_end(affinity_key)
+            while len(self._affinity) > MAX_AFFINITY_ENTRIES:
+                self._affinity.popitem(last=False)
+        
+        return selected
+    
+    async def stream(self, request: Dict[str, Any],
+                     affinity_key: Optional[str] = None,
+                     priority: int = PRIORITY_TEXT,
+                     on_position: Optional[PositionCallback] = None,
+                     on_admitted: Optional[Callable[[float], None]] = None) -> AsyncGenerator[Any, None]:
+        """
+        Stream a chat request, failing over between backends.
+        
+        Args:
+            request: Arguments for AsyncClient.chat (with stream=True).
+            affinity_key: Key to keep on the same backend (session id).
+            priority: Admission priority (PRIORITY_*).
+            on_position: Awaited with the queue position while waiting.
+            on_admitted: Called with the seconds spent waiting for a
+                slot once the request is admitted.
+            
+        Yields:
+            Response chunks.
+            
+        Raises:
+            QueueFullError: If every backend is saturated.
+        """
+        tried: Set[str] = set()
+        queued_at = time.perf_counter()
+        
+        while True:
+            backend = self.select(affinity_key, tried)
+            backend.outstanding += 1
+            backend.total_requests += 1
+            started = False
+            
+            try:
+                async with backend.admission.slot(priority, on_position):
+                    if on_admitted:
+                        on_admitted(time.perf_counter() - queued_at)
+                    stream = await backend.client.chat(**request)
+                    async for chunk in stream:
+                        started = True
+                        yield chunk
+                backend.mark_ok()
+                return
+                
+            except Exception as e:
+                if not _is_backend_failure(e):
+                    raise
+                backend.mark_failed(e)
+                print(f"[LLM] Backend {backend.name} failed: {e}")
+                if started:
+                    raise
+                tried.add(backend.name)
+                
+            finally:
+                backend.outstanding -= 1
+    
+    async def chat(self, request: Dict[str, Any],
+                   affinity_key: Optional[str] = None,
+                   priority: int = PRIORITY_TEXT,
+                   on_admitted: Optional[Callable[[float], None]] = None) -> Any:
+        """
+        Run a non-streaming chat request, failing over between backends.
+        
+        Args:
+            request: Arguments for AsyncClient.chat (with stream=False).
+            affinity_key: Key to keep on the same backend (session id).
+            priority: Admission priority (PRIORITY_*).
+            on_admitted: Called with the seconds spent waiting for a
+                slot once the request is admitted.
+            
+        Returns:
+            Chat response.
+            
+        Raises:
+            QueueFullError: If every backend is saturated.
+        """
+        tried: Set[str] = set()
+        queued_at = time.perf_counter()
+        
+        while True:
+            backend = self.select(affinity_key, tried)
+            backend.outstanding += 1
+            backend.total_requests += 1
+            
+            try:
+                async with backend.admission.slot(priority):
+                    if on_admitted:
+                        on_admitted(time.perf_counter() - queued_at)
+                    response = await backend.client.chat(**request)
+                backend.mark_ok()
+                return response
+                
+            except Exception as e:
+                if not _is_backend_failure(e):
+                    raise
+                backend.mark_failed(e)
+                print(f"[LLM] Backend {backend.name} failed: {e}")
+                tried.add(backend.name)
+                
+            finally:
+                backend.outstanding -= 1
+    
+    async def probe(self, backend: OllamaBackend) -> bool:
+        """
+        Check if a backend answers.
+        
+        Args:
+            backend: Backend to probe.
+            
+        Returns:
+            True if healthy.
+        """
+        backend.last_check = time.time()
+        try:
+            await asyncio.wait_for(backend.client.ps(), self._config.health_check_timeout)
+        except Exception as e:
+            if backend.healthy:
+                print(f"[LLM] Backend {backend.name} unhealthy: {e}")
+            backend.mark_failed(e)
+            return False
+        
+        if not backend.healthy:
+            print(f"[LLM] Backend {backend.name} healthy again")
+        backend.mark_ok()
+        return True
+    
+    async def run_health_checks(self) -> None:
+        """Probe all backends periodically (runs until cancelled)."""
+        interval = self._config.health_check_interval
+        while interval > 0:
+            await asyncio.gather(*(self.probe(b) for b in self._backends))
+            await asyncio.sleep(interval)
+
+
+# Singleton instance
+_ollama_pool: Optional[OllamaPool] = None
+
+
+def get_ollama_pool() -> OllamaPool:
+    """Get Ollama pool instance (singleton)."""
+    global _ollama_pool
+    if _ollama_pool is None:
+        _ollama_pool = OllamaPool()
+    return _ollama_pool
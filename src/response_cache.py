@@ -0,0 +1,216 @@
+"""
+TAMARA Response Cache Module
+Exact-match cache of LLM turns (tokens + TTS audio).
+"""
+
+import hashlib
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from .config import get_config
+
+
+def normalize_message(text: str) -> str:
+    """
+    Normalize a user message for cache lookups.
+    
+    Lowercases, removes accents and punctuation (including Spanish
+    `¿` and `¡`) and collapses whitespace, so "¿Cuántos usuarios hay?"
+    and "cuantos usuarios hay" share the same key.
+    
+    Args:
+        text: User message.
+        
+    Returns:
+        Normalized message.
+    """
+    text = unicodedata.normalize('NFKD', text.lower())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = re.sub(r'[^\w\s]', ' ', text)
+    return " ".join(text.split())
+
+
+# Openers and references that make a message depend on the previous
+# turns (compared after normalize_message)
+FOLLOW_UP_OPENERS = {
+    "y", "e", "pero", "entonces", "tambien", "ademas", "ahora", "and", "also", "then",
+}
+CONTEXT_REFERENCES = {
+    "eso", "esa", "ese", "esos", "esas", "esto", "anterior", "anteriores",
+    "mismo", "misma", "ellos", "ellas", "otro", "otra", "that", "those", "them", "it",
+}
+SHORT_REPLIES = {
+    "si", "no", "vale", "ok", "claro", "gracias", "por favor", "de acuerdo", "yes",
+}
+
+
+def is_self_contained(text: str) -> bool:
+    """
+    Check whether a user message can be answered without the history.
+    
+    Follow-ups ("¿y cuántos de ellos...?"), references to previous
+    answers ("repite eso") and bare replies ("sí", "vale") depend on
+    the conversation, so their answers are not cached.
+    
+    Args:
+        text: User message.
+        
+    Returns:
+        True if the message stands on its own.
+    """
+    normalized = normalize_message(text)
+    words = normalized.split()
+    if not words or normalized in SHORT_REPLIES:
+        return False
+    if words[0] in FOLLOW_UP_OPENERS:
+        return False
+    return not CONTEXT_REFERENCES.intersection(words)
+
+
+@dataclass
+class CachedResponse:
+    """
+    A cached assistant turn.
+    
+    Attributes:
+        tokens: Response tokens, in order.
+        audio: TTS audio chunks (WAV), in order.
+        created_at: Creation timestamp.
+        hits: Number of times this entry was replayed.
+    """
+    tokens: List[str] = field(default_factory=list)
+    audio: List[Any] = field(default_factory=list)
+    created_at: float = field(default_factory=time.time)
+    hits: int = 0
+    
+    @property
+    def text(self) -> str:
+        """Full response text."""
+        return "".join(self.tokens)
+
+
+class ResponseCache:
+    """
+    LRU + TTL cache of complete assistant turns.
+    
+    The key combines the normalized user message with a fingerprint of
+    everything else that shapes the answer (models, generation settings,
+    system prompt, tool set and tool-data version), see
+    `LLMEngine.cache_fingerprint`. The history is not part of the key,
+    so the same question hits in any session; only self-contained
+    messages are cached (see `is_self_contained`). A hit replays the
+    cached tokens and audio without calling Ollama, the tools or the
+    TTS engine.
+    """
+    
+    def __init__(self):
+        self._config = get_config().cache
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+    
+    @property
+    def enabled(self) -> bool:
+        """Indicates if the cache is active."""
+        return self._config.enabled
+    
+    def cacheable(self, message: str) -> bool:
+        """
+        Check whether a turn may be looked up in and stored to the cache.
+        
+        Args:
+            message: User message.
+            
+        Returns:
+            True if the cache is enabled and the message is self-contained.
+        """
+        return self.enabled and is_self_contained(message)
+    
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Cache statistics for the status API."""
+        lookups = self._hits + self._misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_ratio": round(self._hits / lookups, 3) if lookups else None
+        }
+    
+    @staticmethod
+    def make_key(message: str, fingerprint: str) -> str:
+        """
+        Build the cache key of a turn.
+        
+        Args:
+            message: User message.
+            fingerprint: Context fingerprint of the session.
+            
+        Returns:
+            Cache key.
+        """
+        raw = f"{fingerprint}\0{normalize_message(message)}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+    
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """
+        Look up a cached turn.
+        
+        Args:
+            key: Cache key.
+            
+        Returns:
+            Cached response, or None if missing or expired.
+        """
+        entry = self._entries.get(key)
+        
+        if entry and time.time() - entry.created_at > self._config.ttl:
+            del self._entries[key]
+            entry = None
+        
+        if not entry:
+            self._misses += 1
+            return None
+        
+        self._entries.move_to_end(key)
+        entry.hits += 1
+        self._hits += 1
+        return entry
+    
+    def put(self, key: str, entry: CachedResponse) -> None:
+        """
+        Store a turn, evicting the least recently used entries.
+        
+        Args:
+            key: Cache key.
+            entry: Response to cache.
+        """
+        if not entry.text.strip():
+            return
+        
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._config.max_entries:
+            self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        """Remove all cached turns."""
+        self._entries.clear()
+        print("[Cache] Response cache cleared")
+
+
+# Singleton instance
+_response_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    """Get response cache instance (singleton)."""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache()
+    return _response_cache
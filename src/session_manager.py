@@ -0,0 +1,272 @@
+"""
+TAMARA Session Manager Module
+Per-connection conversation sessions with LRU/idle eviction.
+"""
+
+import asyncio
+import re
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+
+from .config import get_config
+from .llm_engine import LLMEngine
+from .session_store import get_session_store
+
+
+# Session ids are generated as UUID hex, but clients may resume any
+# reasonably sized opaque id they were given before.
+SESSION_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{8,64}$')
+
+
+@dataclass
+class Session:
+    """
+    A single conversation session.
+    
+    Attributes:
+        session_id: Resumable session identifier.
+        engine: LLM engine holding this session's history and settings.
+        created_at: Creation timestamp.
+        last_active: Last activity timestamp (used for LRU/TTL).
+        connections: Number of WebSocket connections attached.
+    """
+    session_id: str
+    engine: LLMEngine
+    created_at: float = field(default_factory=time.time)
+    last_active: float = field(default_factory=time.time)
+    connections: int = 0
+    
+    @property
+    def is_active(self) -> bool:
+        """Indicates if a client is currently connected."""
+        return self.connections > 0
+    
+    def touch(self) -> None:
+        """Mark the session as recently used."""
+        self.last_active = time.time()
+
+
+class SessionManager:
+    """
+    Manages conversation sessions.
+    
+    Sessions are kept in LRU order. Eviction policy:
+    1. Idle sessions (no connection) older than `idle_ttl` are dropped.
+    2. While `max_sessions` or `max_memory_mb` is exceeded, the least
+       recently used idle session is dropped.
+    
+    Sessions with a connected client are never evicted.
+    
+    With `persist` enabled, a session id not held in memory is looked up
+    in the SessionStore and its recent history restored (lazily, on
+    reconnect), so evicted sessions cost no RAM but are not lost.
+    
+    Example:
+        manager = get_session_manager()
+        session = await manager.attach(session_id)
+        async for token in session.engine.chat_stream("Hola"):
+            ...
+        manager.detach(session)
+    """
+    
+    def __init__(self):
+        self._config = get_config().sessions
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._tool_registry = None
+    
+    def set_tool_registry(self, registry) -> None:
+        """
+        Configure the tools registry for current and future sessions.
+        
+        Args:
+            registry: ToolRegistry instance.
+        """
+        self._tool_registry = registry
+        for session in self._sessions.values():
+            session.engine.set_tool_registry(registry)
+        if registry is not None and get_config().tools.enabled:
+            print(f"[Sessions] Tools enabled: {registry.tool_names}")
+    
+    @property
+    def tools_enabled(self) -> bool:
+        """Indicates if sessions are created with tools enabled."""
+        return self._tool_registry is not None and get_config().tools.enabled
+    
+    @property
+    def count(self) -> int:
+        """Number of retained sessions."""
+        return len(self._sessions)
+    
+    @property
+    def active_count(self) -> int:
+        """Number of sessions with a connected client."""
+        return sum(1 for s in self._sessions.values() if s.is_active)
+    
+    @property
+    def memory_usage(self) -> int:
+        """Approximate memory retained by all sessions, in bytes."""
+        return sum(s.engine.memory_usage for s in self._sessions.values())
+    
+    def get(self, session_id: str) -> Optional[Session]:
+        """
+        Get an existing session.
+        
+        Args:
+            session_id: Session identifier.
+            
+        Returns:
+            Session or None if it does not exist (or was evicted).
+        """
+        session = self._sessions.get(session_id)
+        if session:
+            session.touch()
+            self._sessions.move_to_end(session_id)
+        return session
+    
+    async def get_or_create(self, session_id: Optional[str] = None) -> Session:
+        """
+        Resume a session or create a new one.
+        
+        Sessions not in memory are restored from the session store
+        if persisted. The store is read in a worker thread, and only
+        for ids sent by the client (a generated id can't be stored).
+        
+        Args:
+            session_id: Session to resume. Invalid or missing ids
+                get a freshly generated one.
+                
+        Returns:
+            Session instance.
+        """
+        messages = None
+        if session_id and SESSION_ID_PATTERN.match(session_id):
+            session = self.get(session_id)
+            if session:
+                return session
+            
+            store = get_session_store()
+            if store.enabled:
+                messages = await asyncio.to_thread(store.load, session_id)
+                # Another connection may have resumed it meanwhile
+                session = self.get(session_id)
+                if session:
+                    return session
+        else:
+            session_id = uuid.uuid4().hex
+        
+        # Make room before adding the new session
+        self.evict(reserve=1)
+        
+        engine = LLMEngine(session_id)
+        engine.set_tool_registry(self._tool_registry)
+        
+        if messages:
+            engine.restore(messages)
+            print(f"[Sessions] Restored {session_id[:8]}... ({engine.history_length} messages)")
+        
+        session = Session(session_id=session_id, engine=engine)
+        self._sessions[session_id] = session
+        return session
+    
+    async def attach(self, session_id: Optional[str] = None) -> Session:
+        """
+        Attach a connection to a session (resuming it if possible).
+        
+        Args:
+            session_id: Session to resume.
+            
+        Returns:
+            Attached session.
+        """
+        session = await self.get_or_create(session_id)
+        session.connections += 1
+        return session
+    
+    def detach(self, session: Session) -> None:
+        """
+        Detach a connection from a session.
+        
+        The session is kept (for resuming) until evicted.
+        
+        Args:
+            session: Session to detach from.
+        """
+        session.connections = max(0, session.connections - 1)
+        session.touch()
+        self.evict()
+    
+    def remove(self, session_id: str) -> bool:
+        """
+        Remove a session.
+        
+        Args:
+            session_id: Session identifier.
+            
+        Returns:
+            True if removed, False if not found.
+        """
+        session = self._sessions.pop(session_id, None)
+        if session is None:
+            return False
+        session.engine.close()
+        return True
+    
+    def evict(self, reserve: int = 0) -> int:
+        """
+        Apply the eviction policy.
+        
+        Args:
+            reserve: Session slots to keep free (for a session about
+                to be created).
+                
+        Returns:
+            Number of evicted sessions.
+        """
+        config = self._config
+        now = time.time()
+        evicted = 0
+        
+        # Idle TTL
+        for session_id, session in list(self._sessions.items()):
+            if not session.is_active and now - session.last_active > config.idle_ttl:
+                del self._sessions[session_id]
+                session.engine.close()
+                evicted += 1
+        
+        # LRU under count and memory caps
+        max_bytes = config.max_memory_mb * 1024 * 1024
+        memory = self.memory_usage
+        for session_id, session in list(self._sessions.items()):
+            if len(self._sessions) + reserve <= config.max_sessions and memory <= max_bytes:
+                break
+            if session.is_active:
+                continue
+            memory -= session.engine.memory_usage
+            del self._sessions[session_id]
+            session.engine.close()
+            evicted += 1
+        
+        if evicted:
+            print(f"[Sessions] Evicted {evicted} sessions. Retained: {len(self._sessions)}")
+        return evicted
+    
+    async def run_sweeper(self) -> None:
+        """Periodically evict idle sessions (runs until cancelled)."""
+        while True:
+            await asyncio.sleep(self._config.sweep_interval)
+            self.evict()
+
+
+# Singleton instance
+_session_manager: Optional[SessionManager] = None
+
+
+def get_session_manager() -> SessionManager:
+    """Get session manager instance (singleton)."""
+    global _session_manager
+    if _session_manager is None:
+        _session_manager = SessionManager()
+    return _session_manager
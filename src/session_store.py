@@ -0,0 +1,317 @@
+"""
+TAMARA Session Store Module
+Append-only SQLite log of conversation histories.
+"""
+
+import asyncio
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .config import get_config
+
+
+# Event kinds
+EVENT_MESSAGE = "message"    # One message appended to history
+EVENT_SNAPSHOT = "snapshot"  # Full history after a trim, summary or reset
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_session ON events (session_id, id);
+"""
+
+
+class SessionStore:
+    """
+    Persistent, append-only store of conversation histories.
+    
+    Every history change is logged as an event: appended messages as
+    `message` events, and rewrites (trim, summary, reset) as a
+    `snapshot` event holding the whole (already bounded) history. A
+    session is restored from its latest snapshot plus the messages
+    after it, so only that recent window is ever read.
+    
+    Writes never block the event loop: they are queued and committed in
+    batches by a background thread, which also creates the database.
+    Reads (`load`) are blocking and meant to run in a worker thread
+    (see SessionManager.get_or_create); they only wait for the pending
+    writes of the session being loaded. Compaction deletes the events
+    superseded by a snapshot and sessions idle for `retention_days`.
+    
+    The system prompt is not stored; it comes from the configuration.
+    
+    Attributes:
+        _config: Sessions configuration.
+        _queue: Pending operations for the writer thread.
+        _writer: Writer thread.
+        _schema_ready: Set once the writer has created the database.
+        _pending: Session id -> queued events not committed yet.
+        _committed: Guards `_pending`, notified after each batch.
+    """
+    
+    def __init__(self):
+        self._config = get_config().sessions
+        self._queue: "queue.Queue[Optional[Tuple[str, Any]]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._ready = False
+        self._schema_ready = threading.Event()
+        self._pending: Dict[str, int] = {}
+        self._committed = threading.Condition()
+    
+    @property
+    def enabled(self) -> bool:
+        """Indicates if sessions are persisted."""
+        return self._config.persist
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection to the store database."""
+        conn = sqlite3.connect(self._config.store_path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+    
+    def _ensure_started(self) -> None:
+        """Start the writer thread (once)."""
+        if self._ready:
+            return
+        with self._lock:
+            if self._ready:
+                return
+            self._writer = threading.Thread(target=self._run_writer, name="session-store", daemon=True)
+            self._writer.start()
+            self._ready = True
+    
+    def _create_schema(self) -> sqlite3.Connection:
+        """Create the database if needed and open the writer connection."""
+        directory = os.path.dirname(self._config.store_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        print(f"[Store] Session store at {self._config.store_path}")
+        return conn
+    
+    # =========================================================================
+    # Writes (queued)
+    # =========================================================================
+    
+    def append_message(self, session_id: str, message: Dict[str, Any]) -> None:
+        """
+        Log a message appended to a session's history.
+        
+        Args:
+            session_id: Session identifier.
+            message: Chat message.
+        """
+        self._enqueue("event", (session_id, EVENT_MESSAGE, message, time.time()))
+    
+    def snapshot(self, session_id: str, messages: List[Dict[str, Any]]) -> None:
+        """
+        Log the full history of a session after a rewrite.
+        
+        Args:
+            session_id: Session identifier.
+            messages: History without the system prompt.
+        """
+        self._enqueue("event", (session_id, EVENT_SNAPSHOT, list(messages), time.time()))
+    
+    def _enqueue(self, op: str, item: Any) -> None:
+        """Queue an operation for the writer thread."""
+        if not self.enabled:
+            return
+        self._ensure_started()
+        if op == "event":
+            with self._committed:
+                self._pending[item[0]] = self._pending.get(item[0], 0) + 1
+        self._queue.put((op, item))
+    
+    def _run_writer(self) -> None:
+        """Writer thread: create the database, then commit queued events in batches."""
+        conn: Optional[sqlite3.Connection] = None
+        try:
+            conn = self._create_schema()
+        except (OSError, sqlite3.Error) as e:
+            print(f"[Store] Cannot open {self._config.store_path}: {e}")
+        finally:
+            self._schema_ready.set()
+        while True:
+            item = self._queue.get()
+            batch = [item]
+            # Drain whatever else is pending into the same transaction
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            try:
+                if conn is not None:
+                    self._write_batch(conn, batch)
+            except sqlite3.Error as e:
+                print(f"[Store] Write error: {e}")
+            finally:
+                self._mark_committed(batch)
+                for _ in batch:
+                    self._queue.task_done()
+            
+            if None in batch:
+                if conn is not None:
+                    conn.close()
+                return
+    
+    def _mark_committed(self, batch: List[Optional[Tuple[str, Any]]]) -> None:
+        """Update the pending event counts after a batch and wake readers."""
+        with self._committed:
+            for item in batch:
+                if item is None or item[0] != "event":
+                    continue
+                session_id = item[1][0]
+                self._pending[session_id] -= 1
+                if not self._pending[session_id]:
+                    del self._pending[session_id]
+            self._committed.notify_all()
+    
+    def _write_batch(self, conn: sqlite3.Connection, batch: List[Optional[Tuple[str, Any]]]) -> None:
+        """Apply a batch of operations in one transaction."""
+        rows = []
+        for item in batch:
+            if item is None:
+                continue
+            op, data = item
+            if op == "event":
+                session_id, kind, payload, created_at = data
+                rows.append((session_id, kind, json.dumps(payload, ensure_ascii=False, default=str), created_at))
+            elif op == "compact":
+                self._flush_rows(conn, rows)
+                rows = []
+                self._compact(conn)
+        self._flush_rows(conn, rows)
+    
+    @staticmethod
+    def _flush_rows(conn: sqlite3.Connection, rows: List[Tuple[str, str, str, float]]) -> None:
+        """Insert event rows and commit."""
+        if not rows:
+            return
+        with conn:
+            conn.executemany(
+                "INSERT INTO events (session_id, kind, payload, created_at) VALUES (?, ?, ?, ?)",
+                rows
+            )
+    
+    def _compact(self, conn: sqlite3.Connection) -> None:
+        """Delete superseded events and expired sessions."""
+        cutoff = time.time() - self._config.retention_days * 86400
+        with conn:
+            expired = conn.execute(
+                "DELETE FROM events WHERE session_id IN ("
+                "  SELECT session_id FROM events GROUP BY session_id HAVING MAX(created_at) < ?)",
+                (cutoff,)
+            ).rowcount
+            superseded = conn.execute(
+                "DELETE FROM events WHERE id < ("
+                "  SELECT MAX(s.id) FROM events s"
+                "  WHERE s.session_id = events.session_id AND s.kind = ?)",
+                (EVENT_SNAPSHOT,)
+            ).rowcount
+        print(f"[Store] Compacted: {superseded} superseded events, {expired} expired events")
+    
+    def flush(self) -> None:
+        """Block until every queued write is committed."""
+        if self._ready:
+            self._queue.join()
+    
+    def close(self) -> None:
+        """Commit pending writes and stop the writer thread."""
+        if self._ready:
+            self._queue.put(None)
+            self._writer.join()
+            self._ready = False
+    
+    # =========================================================================
+    # Reads
+    # =========================================================================
+    
+    def load(self, session_id: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Load a session's history (latest snapshot plus later messages).
+        
+        Blocking: call it from a worker thread. Waits for the pending
+        writes of this session only, so a session evicted a moment ago
+        is restored with its last messages.
+        
+        Args:
+            session_id: Session identifier.
+        
+        Returns:
+            History without the system prompt, or None if the session
+            is unknown or the store can't be read.
+        """
+        if not self.enabled:
+            return None
+        self._ensure_started()
+        self._schema_ready.wait()
+        with self._committed:
+            self._committed.wait_for(lambda: session_id not in self._pending)
+        
+        try:
+            conn = self._connect()
+            try:
+                row = conn.execute(
+                    "SELECT MAX(id) FROM events WHERE session_id = ? AND kind = ?",
+                    (session_id, EVENT_SNAPSHOT)
+                ).fetchone()
+                start = row[0] or 0
+                events = conn.execute(
+                    "SELECT kind, payload FROM events WHERE session_id = ? AND id >= ? ORDER BY id",
+                    (session_id, start)
+                ).fetchall()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"[Store] Read error: {e}")
+            return None
+        
+        if not events:
+            return None
+        
+        messages: List[Dict[str, Any]] = []
+        for kind, payload in events:
+            if kind == EVENT_SNAPSHOT:
+                messages = json.loads(payload)
+            else:
+                messages.append(json.loads(payload))
+        return messages
+    
+    # =========================================================================
+    # Maintenance
+    # =========================================================================
+    
+    async def run_compaction(self) -> None:
+        """Periodically compact the store (runs until cancelled)."""
+        interval = self._config.store_compact_interval
+        while self.enabled and interval > 0:
+            self._enqueue("compact", None)
+            await asyncio.sleep(interval)
+
+
+# Singleton instance
+_session_store: Optional[SessionStore] = None
+
+
+def get_session_store() -> SessionStore:
+    """Get session store instance (singleton)."""
+    global _session_store
+    if _session_store is None:
+        _session_store = SessionStore()
+    return _session_store
@@ -0,0 +1,184 @@
+"""
+TAMARA Single-Flight Module
+Coalesces identical concurrent requests into a single execution.
+"""
+
+import asyncio
+import hashlib
+import json
+from typing import Any, AsyncGenerator, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+
+def request_key(*parts: Any) -> str:
+    """
+    Build a stable key for a request.
+    
+    Args:
+        *parts: JSON-serializable request parts.
+        
+    Returns:
+        Hex digest identifying the request.
+    """
+    raw = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class _Flight:
+    """
+    An in-flight stream shared by several subscribers.
+    
+    Attributes:
+        items: Items produced so far (replayed to late subscribers).
+        done: Whether the producer finished.
+        error: Exception raised by the producer, if any.
+        subscribers: Number of consumers attached.
+        task: Producer task.
+        _changed: Event set (and replaced) every time the flight advances.
+    """
+    
+    def __init__(self):
+        self.items: List[Any] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+    
+    def notify(self) -> None:
+        """Wake up all subscribers."""
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+    
+    async def wait(self) -> None:
+        """Wait until the flight advances."""
+        await self._changed.wait()
+
+
+class SingleFlight:
+    """
+    Deduplicates identical concurrent work.
+    
+    - `stream()`: the first caller for a key starts the producer; other
+      callers with the same key while it is running get the same items
+      (from the start). The producer is cancelled, and the key freed for
+      a fresh flight, when every subscriber has gone away.
+    - `do()`: same for a single awaitable result.
+    
+    Example:
+        flights = SingleFlight()
+        async for chunk in flights.stream(key, lambda: open_stream()):
+            ...
+        result = await flights.do(key, lambda: run_query())
+    """
+    
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self._calls: Dict[str, asyncio.Future] = {}
+        self._waiters: Dict[str, int] = {}
+        self.coalesced = 0
+    
+    @property
+    def in_flight(self) -> int:
+        """Number of running streams and calls."""
+        return len(self._flights) + len(self._calls)
+    
+    def running(self, key: str) -> bool:
+        """Whether a stream with this key is in flight (a new caller joins it)."""
+        return key in self._flights
+    
+    async def stream(
+        self,
+        key: str,
+        factory: Callable[[], AsyncIterator[Any]]
+    ) -> AsyncGenerator[Any, None]:
+        """
+        Subscribe to a shared stream, starting it if needed.
+        
+        Args:
+            key: Request key.
+            factory: Creates the underlying async iterator.
+            
+        Yields:
+            Items of the shared stream.
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight()
+            self._flights[key] = flight
+            flight.task = asyncio.create_task(self._produce(key, flight, factory))
+        else:
+            self.coalesced += 1
+        
+        flight.subscribers += 1
+        index = 0
+        
+        try:
+            while True:
+                while index < len(flight.items):
+                    yield flight.items[index]
+                    index += 1
+                if flight.done:
+                    if flight.error:
+                        raise flight.error
+                    return
+                await flight.wait()
+        finally:
+            flight.subscribers -= 1
+            if flight.subscribers == 0 and not flight.done:
+                # Detach it now: a new caller must not join a dying flight
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+                flight.task.cancel()
+    
+    async def _produce(
+        self,
+        key: str,
+        flight: _Flight,
+        factory: Callable[[], AsyncIterator[Any]]
+    ) -> None:
+        """Run the underlying stream and publish its items."""
+        try:
+            async for item in factory():
+                flight.items.append(item)
+                flight.notify()
+        except asyncio.CancelledError:
+            flight.error = asyncio.CancelledError()
+            raise
+        except Exception as e:
+            flight.error = e
+        finally:
+            flight.done = True
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            flight.notify()
+    
+    async def do(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await a shared call, starting it if needed.
+        
+        Args:
+            key: Request key.
+            factory: Creates the underlying awaitable.
+            
+        Returns:
+            Result of the shared call.
+        """
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(factory())
+            self._calls[key] = future
+            future.add_done_callback(lambda _: self._calls.pop(key, None))
+        else:
+            self.coalesced += 1
+        
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            return await asyncio.shield(future)
+        finally:
+            self._waiters[key] -= 1
+            if self._waiters[key] == 0:
+                del self._waiters[key]
+                if not future.done():
+                    if self._calls.get(key) is future:
+                        del self._calls[key]
+                    future.cancel()
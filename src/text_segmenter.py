@@ -0,0 +1,201 @@
+"""
+TAMARA Text Segmenter Module
+Splits streamed LLM text into speakable chunks for TTS.
+"""
+
+from typing import Iterator, List, Optional, Tuple
+
+from .config import get_config
+
+
+# Sentence terminators and clause separators
+SENTENCE_END = ".!?…"
+CLAUSE_END = ",;:"
+
+# Characters that may follow a terminator and belong to its chunk
+CLOSERS = "\"')]}»”’*"
+
+# Words that end with a period without ending the sentence
+# (Spanish first, compared lowercase and without the period)
+ABBREVIATIONS = {
+    "sr", "sra", "srta", "sres", "dr", "dra", "lic", "ing", "prof", "ud",
+    "uds", "vd", "vds", "d", "dña", "av", "avda", "c", "pág", "págs", "pag",
+    "núm", "num", "nº", "tel", "aprox", "ej", "p", "cap", "art", "vol",
+    "fig", "admón", "depto", "dpto", "cía", "sta", "sto", "km", "kg", "min",
+    "máx", "mín", "vs", "mr", "mrs", "ms", "e.g", "i.e", "p.ej", "ee.uu",
+}
+
+# Boundary kinds
+SENTENCE = "sentence"
+CLAUSE = "clause"
+
+
+def _word_before(text: str, index: int) -> str:
+    """Word ending right before `index` (leading punctuation dropped)."""
+    start = index
+    while start > 0 and not text[start - 1].isspace():
+        start -= 1
+    return text[start:index].lstrip("¿¡(\"'«“‘[")
+
+
+def _is_period_boundary(text: str, index: int) -> bool:
+    """
+    Check whether the period at `index` ends a sentence.
+    
+    Abbreviations ("Sr.", "pág."), initials ("J.") and list markers
+    at the start of a line ("1.") don't.
+    """
+    word = _word_before(text, index)
+    if not word:
+        return True
+    if word.lower() in ABBREVIATIONS:
+        return False
+    if len(word) == 1 and word.isupper():
+        return False
+    if word.isdigit():
+        line_start = text.rfind("\n", 0, index) + 1
+        if not text[line_start:index - len(word)].strip():
+            return False
+    return True
+
+
+def _boundaries(text: str) -> Iterator[Tuple[int, str]]:
+    """
+    Find the confirmed chunk boundaries of a text.
+    
+    A terminator only counts once the whitespace after it has arrived,
+    so "3.5", "1.000" or "3,5" never split and a period at the very end
+    of the stream is left for `flush`. Line breaks always split.
+    
+    Yields:
+        (end index, boundary kind) in order.
+    """
+    length = len(text)
+    for i, ch in enumerate(text):
+        if ch == "\n":
+            yield i, SENTENCE
+            continue
+        if ch not in SENTENCE_END and ch not in CLAUSE_END:
+            continue
+        
+        end = i + 1
+        while end < length and text[end] in CLOSERS:
+            end += 1
+        if end >= length or not text[end].isspace():
+            continue
+        if ch == "." and not _is_period_boundary(text, i):
+            continue
+        
+        yield end, SENTENCE if ch in SENTENCE_END else CLAUSE
+
+
+def _inside_exclamation_or_question(text: str) -> bool:
+    """Check whether a Spanish "¿...?" or "¡...!" is still open."""
+    return text.count("¿") > text.count("?") or text.count("¡") > text.count("!")
+
+
+class SentenceSegmenter:
+    """
+    Incremental segmenter of streamed text into TTS chunks.
+    
+    Works on the accumulated text, not on single tokens, so a sentence
+    ends wherever the tokenizer splits it (" casa." or "." alone).
+    
+    - Chunks end at sentence terminators followed by whitespace and at
+      line breaks. Abbreviations, initials, decimals and list markers
+      ("1. ") don't end a sentence.
+    - Sentences shorter than `min_chars` are merged with the next one.
+    - Text longer than `max_chars` without a sentence end is cut at the
+      last clause separator (",;:"), else at the last space.
+    - The first chunk may end at a clause separator once it has
+      `first_chars`, so audio starts as early as possible. It never
+      cuts inside an open "¿...?" or "¡...!".
+    
+    Usage:
+        segmenter = SentenceSegmenter()
+        for token in stream:
+            for chunk in segmenter.feed(token):
+                speak(chunk)
+        for chunk in segmenter.flush():
+            speak(chunk)
+    
+    Attributes:
+        min_chars: Minimum length of a chunk (except the first and last).
+        max_chars: Maximum length of a chunk.
+        first_chars: Minimum length of the first chunk.
+        _buffer: Text not emitted yet.
+        _emitted: Number of chunks emitted.
+    """
+    
+    def __init__(self, min_chars: Optional[int] = None, max_chars: Optional[int] = None,
+                 first_chars: Optional[int] = None):
+        config = get_config().tts
+        self.min_chars = config.chunk_min_chars if min_chars is None else min_chars
+        self.max_chars = max(1, config.chunk_max_chars if max_chars is None else max_chars)
+        self.first_chars = config.first_chunk_chars if first_chars is None else first_chars
+        self._buffer = ""
+        self._emitted = 0
+    
+    def feed(self, text: str) -> List[str]:
+        """
+        Add streamed text.
+        
+        Args:
+            text: Next token(s).
+        
+        Returns:
+            Chunks completed by this text (often none).
+        """
+        self._buffer += text
+        chunks = []
+        while True:
+            cut = self._find_cut()
+            if cut is None:
+                break
+            chunk = self._buffer[:cut].strip()
+            self._buffer = self._buffer[cut:].lstrip()
+            if chunk:
+                chunks.append(chunk)
+                self._emitted += 1
+        return chunks
+    
+    def flush(self) -> List[str]:
+        """
+        End of stream: return the remaining text.
+        
+        Returns:
+            The last chunk, if any.
+        """
+        chunk = self._buffer.strip()
+        self._buffer = ""
+        if not chunk:
+            return []
+        self._emitted += 1
+        return [chunk]
+    
+    def _find_cut(self) -> Optional[int]:
+        """Position where the buffer should be cut now, if any."""
+        buffer = self._buffer
+        first = self._emitted == 0
+        min_chars = self.first_chars if first else self.min_chars
+        last_fit = None
+        
+        for end, kind in _boundaries(buffer):
+            if end > self.max_chars:
+                break
+            size = len(buffer[:end].strip())
+            if kind == SENTENCE and size >= min_chars:
+                return end
+            if (kind == CLAUSE and first and size >= self.first_chars
+                    and not _inside_exclamation_or_question(buffer[:end])):
+                return end
+            last_fit = end
+        
+        if len(buffer) <= self.max_chars:
+            return None
+        
+        # Too long without a sentence end: cut at the last separator
+        if last_fit:
+            return last_fit
+        space = buffer.rfind(" ", 0, self.max_chars)
+        return space if space > 0 else self.max_chars
@@ -0,0 +1,69 @@
+"""
+TAMARA Token Estimation Module
+Cheap token count estimates for context budgeting.
+"""
+
+import json
+from typing import Any, Dict
+
+
+# Average characters per token for Spanish/English text with
+# BPE tokenizers. Deliberately conservative (over-estimates).
+CHARS_PER_TOKEN = 3.5
+
+# Per-message overhead of the chat template (role markers, separators).
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens of a text.
+    
+    Args:
+        text: Text to measure.
+        
+    Returns:
+        Estimated token count.
+    """
+    if not text:
+        return 0
+    return int(len(text) / CHARS_PER_TOKEN) + 1
+
+
+def estimate_message_tokens(message: Dict[str, Any]) -> int:
+    """
+    Estimate the number of tokens a chat message adds to the prompt.
+    
+    Args:
+        message: Chat message (role, content, optional tool_calls).
+        
+    Returns:
+        Estimated token count, including template overhead.
+    """
+    tokens = MESSAGE_OVERHEAD_TOKENS + estimate_tokens(message.get('content') or '')
+    
+    tool_calls = message.get('tool_calls')
+    if tool_calls:
+        tokens += estimate_tokens(json.dumps(tool_calls, ensure_ascii=False, default=str))
+    
+    return tokens
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Truncate a text to an estimated token budget.
+    
+    Args:
+        text: Text to truncate.
+        max_tokens: Token budget.
+        
+    Returns:
+        Original text if it fits, otherwise a truncated copy
+        ending with a truncation marker.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    
+    max_chars = max(0, int(max_tokens * CHARS_PER_TOKEN))
+    omitted = len(text) - max_chars
+    return f"{text[:max_chars]}\n... [truncated {omitted} characters]"
@@ -20,6 +20,8 @@ class ToolDefinition:
         name: Unique tool name.
         description: Clear description of what the tool does.
         parameters: JSON schema of accepted parameters.
+        keywords: Extra words (any language) that help select the tool
+            for a user message. Not sent to the LLM.
     """
     name: str
     description: str
@@ -28,6 +30,7 @@ class ToolDefinition:
         "properties": {},
         "required": []
     })
+    keywords: List[str] = field(default_factory=list)
     
     def to_ollama_format(self) -> Dict[str, Any]:
         """
@@ -97,6 +100,21 @@ class BaseTool(ABC):
         """
         pass
     
+    def can_coalesce(self, **kwargs) -> bool:
+        """
+        Check whether identical concurrent calls may share one execution.
+        
+        Only safe for calls without side effects. Tools that can write
+        must override this and return False for those calls.
+        
+        Args:
+            **kwargs: Parameters of the call.
+            
+        Returns:
+            True if the call only reads.
+        """
+        return True
+    
     @property
     def name(self) -> str:
         """Shortcut to get tool name."""
@@ -4,7 +4,9 @@ Secure client for MariaDB connection.
 """
 
 import re
-from typing import List, Dict, Any, Optional
+import asyncio
+import threading
+from typing import Callable, List, Dict, Any, Optional
 from contextlib import contextmanager
 
 try:
@@ -29,17 +31,22 @@ class MariaDBClient:
     - Table name validation
     - Connection pooling
     - Query timeout
+    - Server-side cancellation of abandoned queries
     
     Attributes:
         _config: Database configuration.
         _pool: MariaDB connection pool.
+        _pool_size: Connections in the pool.
+        _slots: Limits concurrent `run_async` calls to the pool size.
+        _local: Per-thread record of the connection running a query.
     """
     
     # Allowed queries (case insensitive)
     ALLOWED_READ_COMMANDS = ['SELECT', 'SHOW', 'DESCRIBE', 'DESC', 'EXPLAIN']
     
     def __init__(self, host: str, port: int, user: str, 
-                 password: str, database: str, allow_write: bool = False):
+                 password: str, database: str, allow_write: bool = False,
+                 pool_size: int = 3):
         """
         Initialize MariaDB client.
         
@@ -50,6 +57,7 @@ class MariaDBClient:
             password: User password.
             database: Database name.
             allow_write: If True, allows write operations.
+            pool_size: Connections in the pool.
         """
         self._host = host
         self._port = port
@@ -58,7 +66,10 @@ class MariaDBClient:
         self._database = database
         self._allow_write = allow_write
         self._pool = None
+        self._pool_size = max(1, pool_size)
+        self._slots: Optional[asyncio.Semaphore] = None
         self._connected = False
+        self._local = threading.local()
     
     @property
     def is_available(self) -> bool:
@@ -89,7 +100,7 @@ class MariaDBClient:
                 password=self._password,
                 database=self._database,
                 pool_name="tamara_pool",
-                pool_size=3
+                pool_size=self._pool_size
             )
             self._connected = True
             print(f"[DB] Connected to {self._database}@{self._host}")
@@ -129,20 +140,32 @@ class MariaDBClient:
         Raises:
             SecurityError: If query is not allowed.
         """
-        query_stripped = query.strip()
-        query_upper = query_stripped.upper()
+        query_upper = query.strip().upper()
         
         # Get first command
         first_word = query_upper.split()[0] if query_upper.split() else ""
         
         # Check if it's an allowed command
-        if first_word not in self.ALLOWED_READ_COMMANDS:
+        if not self.is_read_query(query):
             if not self._allow_write:
                 raise SecurityError(
                     f"Only read queries are allowed. "
                     f"Command '{first_word}' not authorized."
                 )
     
+    def is_read_query(self, query: str) -> bool:
+        """
+        Check whether a query only reads data.
+        
+        Args:
+            query: SQL query.
+            
+        Returns:
+            True if it starts with an allowed read command.
+        """
+        words = query.strip().upper().split()
+        return bool(words) and words[0] in self.ALLOWED_READ_COMMANDS
+    
     def _validate_identifier(self, identifier: str) -> None:
         """
         Validate that an identifier (table, column) is safe.
@@ -179,6 +202,10 @@ class MariaDBClient:
         self._validate_query(query)
         
         with self._get_connection() as conn:
+            running = getattr(self._local, "running", None)
+            if running is not None:
+                running["connection_id"] = conn.connection_id
+            
             cursor = conn.cursor(dictionary=True)
             try:
                 if params:
@@ -192,6 +219,82 @@ class MariaDBClient:
             finally:
                 cursor.close()
     
+    def kill_query(self, connection_id: int) -> None:
+        """
+        Abort the statement running on a connection (KILL QUERY).
+        
+        Uses a dedicated connection so it works even when the pool is
+        exhausted. The connection itself stays open and returns to the pool.
+        
+        Args:
+            connection_id: Server thread id of the connection.
+        """
+        if not MARIADB_AVAILABLE:
+            return
+        
+        try:
+            conn = mariadb.connect(
+                host=self._host,
+                port=self._port,
+                user=self._user,
+                password=self._password,
+                database=self._database
+            )
+            try:
+                cursor = conn.cursor()
+                cursor.execute(f"KILL QUERY {int(connection_id)}")
+                cursor.close()
+            finally:
+                conn.close()
+            print(f"[DB] Killed query on connection {connection_id}")
+        except mariadb.Error as e:
+            print(f"[DB] Could not kill query: {e}")
+    
+    async def run_async(self, method: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run a blocking client method in a worker thread.
+        
+        MariaDB's pool raises instead of waiting when it is empty, so at
+        most `pool_size` calls run at once; the others wait here for a
+        free connection (concurrent tool calls, several sessions).
+        
+        If the awaiting task is cancelled (the user interrupted the
+        turn), the query still running on the server is killed instead
+        of holding a pooled connection until it completes. Its slot is
+        only released once the worker thread has returned the connection.
+        
+        Args:
+            method: Bound client method (e.g. `client.execute_query`).
+            *args: Method arguments.
+            
+        Returns:
+            Method result.
+        """
+        running: Dict[str, int] = {}
+        
+        def call():
+            self._local.running = running
+            try:
+                return method(*args)
+            finally:
+                self._local.running = None
+        
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self._pool_size)
+        
+        loop = asyncio.get_running_loop()
+        await self._slots.acquire()
+        future = loop.run_in_executor(None, call)
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            connection_id = running.get("connection_id")
+            if connection_id is not None:
+                # Fire and forget: don't delay the cancellation
+                loop.run_in_executor(None, self.kill_query, connection_id)
+            raise
+    
     def list_databases(self) -> List[str]:
         """
         List all available databases.
@@ -260,7 +363,7 @@ def get_db_client() -> Optional[MariaDBClient]:
 
 def init_db_client(host: str, port: int, user: str, 
                    password: str, database: str, 
-                   allow_write: bool = False) -> MariaDBClient:
+                   allow_write: bool = False, pool_size: int = 3) -> MariaDBClient:
     """
     Initialize MariaDB client singleton.
     
@@ -271,6 +374,7 @@ def init_db_client(host: str, port: int, user: str,
         password: Password.
         database: Database name.
         allow_write: If allows write operations.
+        pool_size: Connections in the pool.
         
     Returns:
         Initialized MariaDBClient instance.
@@ -283,7 +387,8 @@ def init_db_client(host: str, port: int, user: str,
         user=user,
         password=password,
         database=database,
-        allow_write=allow_write
+        allow_write=allow_write,
+        pool_size=pool_size
     )
     
     return _db_client
@@ -5,6 +5,8 @@ MariaDB tools for Ollama Function Calling.
 
 from typing import Any, Dict, List
 from ..base import BaseTool, ToolDefinition
+from ..result_budget import format_rows, result_budget
+from ...config import get_config
 from .client import get_db_client
 
 
@@ -28,7 +30,8 @@ class ListTablesTool(BaseTool):
                 "type": "object",
                 "properties": {},
                 "required": []
-            }
+            },
+            keywords=["tablas", "base de datos", "datos", "disponibles"]
         )
     
     async def execute(self, **kwargs) -> str:
@@ -39,7 +42,7 @@ class ListTablesTool(BaseTool):
             return "Error: No database connection."
         
         try:
-            tables = client.list_tables()
+            tables = await client.run_async(client.list_tables)
             
             if not tables:
                 return "The database has no tables."
@@ -76,7 +79,8 @@ class DescribeTableTool(BaseTool):
                     }
                 },
                 "required": ["table_name"]
-            }
+            },
+            keywords=["estructura", "columnas", "campos", "esquema"]
         )
     
     async def execute(self, table_name: str = "", **kwargs) -> str:
@@ -90,7 +94,7 @@ class DescribeTableTool(BaseTool):
             return "Error: No database connection."
         
         try:
-            schema = client.describe_table(table_name)
+            schema = await client.run_async(client.describe_table, table_name)
             
             if not schema:
                 return f"Table '{table_name}' does not exist or is empty."
@@ -141,9 +145,15 @@ class QueryDatabaseTool(BaseTool):
                     }
                 },
                 "required": ["query"]
-            }
+            },
+            keywords=["consulta", "muestra", "busca", "dame", "registros", "sql"]
         )
     
+    def can_coalesce(self, query: str = "", **kwargs) -> bool:
+        """Only read queries are shared: a write must run once per call."""
+        client = get_db_client()
+        return client is not None and client.is_read_query(query)
+    
     async def execute(self, query: str = "", **kwargs) -> str:
         """Execute a SELECT query and return results."""
         if not query:
@@ -155,7 +165,7 @@ class QueryDatabaseTool(BaseTool):
             return "Error: No database connection."
         
         try:
-            results = client.execute_query(query)
+            results = await client.run_async(client.execute_query, query)
             
             if not results:
                 return "The query returned no results."
@@ -168,39 +178,31 @@ class QueryDatabaseTool(BaseTool):
             if "SecurityError" in error_msg or "not authorized" in error_msg.lower():
                 return f"Security error: {error_msg}"
             return f"Error executing query: {error_msg}"
+        
+        finally:
+            # A write (allow_write) may have changed data behind cached answers
+            if get_config().database.allow_write and not client.is_read_query(query):
+                from ..registry import get_tool_registry
+                get_tool_registry().invalidate_data()
     
     def _format_results(self, results: List[Dict[str, Any]]) -> str:
         """
         Format query results for the LLM.
         
+        Rows are rendered as CSV within the tool's token budget
+        (see result_budget.format_rows).
+        
         Args:
             results: List of dictionaries with results.
             
         Returns:
             Formatted string with results.
         """
-        count = len(results)
-        
-        # For single result, show directly
-        if count == 1:
-            row = results[0]
-            if len(row) == 1:
-                # Query like COUNT(*) or similar
-                return str(list(row.values())[0])
-            return str(row)
-        
-        # For multiple results
-        output_lines = [f"Found {count} results:"]
-        
-        # Limit to 15 results to not overload the LLM
-        max_show = 15
-        for i, row in enumerate(results[:max_show]):
-            output_lines.append(f"  {i+1}. {row}")
-        
-        if count > max_show:
-            output_lines.append(f"  ... and {count - max_show} more results.")
-        
-        return "\n".join(output_lines)
+        return format_rows(
+            results,
+            max_tokens=result_budget(self.definition.name),
+            max_field_chars=get_config().tools.result_field_chars
+        )
 
 
 class GetTableCountTool(BaseTool):
@@ -228,7 +230,8 @@ class GetTableCountTool(BaseTool):
                     }
                 },
                 "required": ["table_name"]
-            }
+            },
+            keywords=["cuantos", "cuantas", "numero", "total", "contar"]
         )
     
     async def execute(self, table_name: str = "", **kwargs) -> str:
@@ -242,7 +245,7 @@ class GetTableCountTool(BaseTool):
             return "Error: No database connection."
         
         try:
-            count = client.get_table_count(table_name)
+            count = await client.run_async(client.get_table_count, table_name)
             return f"Table '{table_name}' has {count} records."
             
         except ValueError as e:
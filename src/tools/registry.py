@@ -3,9 +3,13 @@ TAMARA Tool Registry
 Central registry for available tools.
 """
 
-from typing import Dict, List, Any, Optional
+import asyncio
+from typing import Dict, List, Any, Optional, Tuple
 from .base import BaseTool, ToolDefinition
+from .result_budget import compact_text, result_budget
+from .selector import ToolSelector
 from ..config import get_config
+from ..single_flight import SingleFlight, request_key
 
 
 class ToolRegistry:
@@ -19,17 +23,24 @@ class ToolRegistry:
         registry = ToolRegistry()
         registry.register(MyTool())
         
-        # Get tools for Ollama
+        # Get tools for Ollama (all, or the relevant ones for a message)
         tools = registry.get_ollama_tools()
+        tools = registry.select_tools("¿Cuántos usuarios hay?")
         
         # Execute a tool
         result = await registry.execute_tool("my_tool", {"arg": "value"})
+        
+        # Execute independent tools concurrently
+        results = await registry.execute_tools([("a", {}), ("b", {"x": 1})])
     """
     
     def __init__(self):
         """Initialize registry with default tools."""
         self._tools: Dict[str, BaseTool] = {}
         self._initialized = False
+        self._data_version = 0
+        self._flights = SingleFlight()
+        self._selector = ToolSelector()
     
     def initialize(self) -> None:
         """
@@ -93,6 +104,7 @@ class ToolRegistry:
         """
         if name in self._tools:
             del self._tools[name]
+            self._selector.forget(name)
             return True
         return False
     
@@ -132,10 +144,48 @@ class ToolRegistry:
             for tool in self._tools.values()
         ]
     
+    def select_tools(self, message: str) -> List[Dict[str, Any]]:
+        """
+        Return the tool definitions relevant to a user message.
+        
+        Tools are scored against the message (see ToolSelector) and the
+        `select_top_k` best plus `pinned_tools` are returned, in
+        registration order so identical selections render an identical
+        prompt (and reuse Ollama's prompt cache). The full set is
+        returned when the registry is small enough or no tool scores
+        at least `select_min_score` (e.g. a bare follow-up like "¿y ayer?").
+        
+        Args:
+            message: User message of the turn.
+            
+        Returns:
+            List of dictionaries with Ollama structure.
+        """
+        config = get_config().tools
+        definitions = [tool.definition for tool in self._tools.values()]
+        if not message or config.select_top_k <= 0 or len(definitions) <= config.select_top_k:
+            return self.get_ollama_tools()
+        
+        scores = self._selector.score(message, definitions)
+        best = sorted(scores, key=scores.get, reverse=True)[:config.select_top_k]
+        if scores[best[0]] < config.select_min_score:
+            print("[Tools] No relevant tool found, sending all")
+            return self.get_ollama_tools()
+        
+        chosen = set(best) | set(config.pinned_tools)
+        selected = [d.to_ollama_format() for d in definitions if d.name in chosen]
+        print(f"[Tools] Selected {len(selected)}/{len(definitions)} tools")
+        return selected
+    
     async def execute_tool(self, name: str, arguments: Dict[str, Any]) -> str:
         """
         Execute a tool by name.
         
+        Identical concurrent calls (same tool and arguments, e.g. several
+        sessions asking the same question) share a single execution,
+        unless the tool reports side effects (see BaseTool.can_coalesce).
+        The result is compacted to the tool's token budget.
+        
         Args:
             name: Tool name.
             arguments: Dictionary with arguments.
@@ -150,7 +200,12 @@ class ToolRegistry:
             return f"Tool '{name}' not found. Available: {available}"
         
         try:
-            result = await tool.execute(**arguments)
+            if get_config().tools.coalesce_calls and tool.can_coalesce(**arguments):
+                key = request_key(name, arguments, self._data_version)
+                result = await self._flights.do(key, lambda: tool.execute(**arguments))
+            else:
+                result = await tool.execute(**arguments)
+            result = compact_text(result, result_budget(name))
             print(f"[Tools] Executed: {name} -> {len(result)} chars")
             return result
             
@@ -159,6 +214,44 @@ class ToolRegistry:
             print(f"[Tools] {error_msg}")
             return error_msg
     
+    async def execute_tools(
+        self,
+        calls: List[Tuple[str, Dict[str, Any]]],
+        timeout: Optional[float] = None
+    ) -> List[str]:
+        """
+        Execute several independent tools concurrently.
+        
+        Args:
+            calls: List of (name, arguments) tuples.
+            timeout: Maximum seconds per tool (None = no limit).
+            
+        Returns:
+            Results as strings, in the same order as `calls`.
+        """
+        async def run(name: str, arguments: Dict[str, Any]) -> str:
+            try:
+                return await asyncio.wait_for(self.execute_tool(name, arguments), timeout)
+            except asyncio.TimeoutError:
+                print(f"[Tools] Timeout: {name}")
+                return f"Error: {name} timed out after {timeout:.0f} seconds."
+        
+        return list(await asyncio.gather(*(run(name, args) for name, args in calls)))
+    
+    def invalidate_data(self) -> None:
+        """
+        Signal that the data behind the tools changed.
+        
+        Bumps `data_version`, so cached answers based on previous
+        tool results are no longer used.
+        """
+        self._data_version += 1
+    
+    @property
+    def data_version(self) -> int:
+        """Version of the data behind the tools."""
+        return self._data_version
+    
     @property
     def count(self) -> int:
         """Number of registered tools."""
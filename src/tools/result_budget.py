@@ -0,0 +1,186 @@
+"""
+TAMARA Tools - Result Budget
+Compacts tool outputs to a token budget before they enter history.
+"""
+
+import csv
+import io
+from decimal import Decimal
+from typing import Any, Dict, List
+
+from ..config import get_config
+from ..tokens import CHARS_PER_TOKEN, estimate_tokens
+
+
+def result_budget(tool_name: str) -> int:
+    """
+    Get the token budget for a tool's result.
+    
+    Args:
+        tool_name: Tool name.
+    
+    Returns:
+        Budget from `tools.result_budgets`, or `tools.result_tokens`.
+    """
+    config = get_config().tools
+    return config.result_budgets.get(tool_name, config.result_tokens)
+
+
+def compact_text(text: str, max_tokens: int) -> str:
+    """
+    Fit a text result to a token budget, cutting at line boundaries.
+    
+    Args:
+        text: Tool result.
+        max_tokens: Token budget.
+    
+    Returns:
+        The text if it fits, otherwise its first lines plus a line
+        telling how many were left out.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    
+    lines = text.split("\n")
+    kept: List[str] = []
+    used = 0
+    for line in lines:
+        cost = estimate_tokens(line) + 1
+        if used + cost > max_tokens - 10:
+            break
+        kept.append(line)
+        used += cost
+    
+    if not kept:
+        # A single huge line: cut it
+        max_chars = max(0, int((max_tokens - 10) * CHARS_PER_TOKEN))
+        return f"{text[:max_chars]}... [{len(text) - max_chars} more characters]"
+    
+    kept.append(f"... [{len(lines) - len(kept)} more lines]")
+    return "\n".join(kept)
+
+
+def _cell(value: Any, max_chars: int) -> str:
+    """Render a single value compactly."""
+    if value is None:
+        return "NULL"
+    if isinstance(value, (bytes, bytearray)):
+        return f"<{len(value)} bytes>"
+    if isinstance(value, float):
+        return f"{value:.6g}"
+    
+    text = " ".join(str(value).split())
+    if len(text) > max_chars:
+        text = text[:max_chars - 1] + "…"
+    return text
+
+
+def _csv_line(values: List[str]) -> str:
+    """Render values as one CSV line."""
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="").writerow(values)
+    return buffer.getvalue()
+
+
+def _number(value: float) -> str:
+    """Render a summary number."""
+    return f"{value:.6g}"
+
+
+def _numeric_summary(rows: List[Dict[str, Any]], columns: List[str]) -> List[str]:
+    """
+    Summarize numeric columns over all rows (min, max, average).
+    
+    Args:
+        rows: Result rows.
+        columns: Columns to consider.
+    
+    Returns:
+        One line per numeric column.
+    """
+    lines = []
+    for column in columns:
+        values = [row.get(column) for row in rows if row.get(column) is not None]
+        numeric = all(
+            isinstance(v, (int, float, Decimal)) and not isinstance(v, bool)
+            for v in values
+        )
+        if not values or not numeric:
+            continue
+        numbers = [float(v) for v in values]
+        lines.append(
+            f"{column} over all rows: min {_number(min(numbers))}, "
+            f"max {_number(max(numbers))}, avg {_number(sum(numbers) / len(numbers))}"
+        )
+    return lines
+
+
+def format_rows(rows: List[Dict[str, Any]], max_tokens: int, max_field_chars: int = 80) -> str:
+    """
+    Render query rows compactly for the LLM.
+    
+    Rows are rendered as CSV under a single header line, so column
+    names are not repeated per row. Columns holding the same value in
+    every row are stated once, long text fields are cut at
+    `max_field_chars`, and rows that don't fit in `max_tokens` are
+    replaced by a count and min/max/avg lines for numeric columns.
+    
+    Args:
+        rows: Result rows (column -> value).
+        max_tokens: Token budget.
+        max_field_chars: Maximum characters per field.
+    
+    Returns:
+        Formatted result.
+    """
+    count = len(rows)
+    if count == 0:
+        return "The query returned no results."
+    
+    columns = list(rows[0].keys())
+    
+    if count == 1:
+        row = rows[0]
+        if len(row) == 1:
+            # Query like COUNT(*) or similar
+            return _cell(row[columns[0]], max_field_chars)
+        return ", ".join(f"{c}={_cell(row[c], max_field_chars)}" for c in columns)
+    
+    lines = [f"Found {count} results:"]
+    
+    # Columns with the same value in every row are stated once
+    constant = [c for c in columns if all(row.get(c) == rows[0].get(c) for row in rows)]
+    varying = [c for c in columns if c not in constant]
+    if constant:
+        lines.append("Same in all rows: " + ", ".join(
+            f"{c}={_cell(rows[0].get(c), max_field_chars)}" for c in constant
+        ))
+    if not varying:
+        lines.append(f"All {count} rows are identical.")
+        return "\n".join(lines)
+    
+    lines.append(_csv_line(varying))
+    body = [
+        _csv_line([_cell(row.get(c), max_field_chars) for c in varying])
+        for row in rows
+    ]
+    
+    used = sum(estimate_tokens(line) + 1 for line in lines)
+    if used + sum(estimate_tokens(line) + 1 for line in body) <= max_tokens:
+        return "\n".join(lines + body)
+    
+    # Not everything fits: keep room for the summary lines
+    footer = _numeric_summary(rows, varying)
+    used += sum(estimate_tokens(line) + 1 for line in footer) + 10
+    shown = 0
+    for line in body:
+        cost = estimate_tokens(line) + 1
+        if used + cost > max_tokens:
+            break
+        lines.append(line)
+        used += cost
+        shown += 1
+    
+    lines.append(f"... {count - shown} more rows not shown ({shown} of {count} listed).")
+    lines.extend(footer)
+    return "\n".join(lines)
@@ -0,0 +1,126 @@
+"""
+TAMARA Tools - Selector
+Scores tools against a user message to send only the relevant ones.
+"""
+
+import math
+import re
+import unicodedata
+import zlib
+from typing import Dict, List, Set, Tuple
+
+from .base import ToolDefinition
+
+
+# Dimension of the hashed character n-gram vectors
+VECTOR_DIM = 1024
+
+# Character n-gram size
+NGRAM = 3
+
+# Words that carry no meaning for tool selection (Spanish and English)
+STOPWORDS = {
+    "a", "al", "con", "cual", "cuales", "de", "del", "el", "en", "es", "hay",
+    "la", "las", "lo", "los", "me", "mi", "por", "que", "se", "su", "un",
+    "una", "y", "o", "the", "of", "to", "and", "or", "in", "is", "for",
+    "this", "use", "tool", "you", "with", "on", "it", "be", "are", "an",
+}
+
+
+def _normalize(text: str) -> str:
+    """Lowercase and strip accents."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    return "".join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def _words(text: str) -> Set[str]:
+    """Meaningful words of a text (snake_case names are split)."""
+    words = re.findall(r"[a-z0-9]+", _normalize(text).replace("_", " "))
+    return {w for w in words if len(w) > 1 and w not in STOPWORDS}
+
+
+def _vector(text: str) -> Dict[int, float]:
+    """
+    Hashed character n-gram vector of a text (L2-normalized, sparse).
+    
+    A lightweight stand-in for an embedding model: texts sharing word
+    stems ("tabla"/"tables", "cuantos"/"count") get close vectors.
+    """
+    vector: Dict[int, float] = {}
+    for word in _words(text):
+        padded = f" {word} "
+        for i in range(len(padded) - NGRAM + 1):
+            bucket = zlib.crc32(padded[i:i + NGRAM].encode("utf-8")) % VECTOR_DIM
+            vector[bucket] = vector.get(bucket, 0.0) + 1.0
+    
+    norm = math.sqrt(sum(v * v for v in vector.values()))
+    if norm:
+        vector = {k: v / norm for k, v in vector.items()}
+    return vector
+
+
+def _cosine(a: Dict[int, float], b: Dict[int, float]) -> float:
+    """Cosine similarity of two normalized sparse vectors."""
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(v * b.get(k, 0.0) for k, v in a.items())
+
+
+class ToolSelector:
+    """
+    Relevance scoring of tools for a user message.
+    
+    Score = keyword overlap (words of the tool's name and `keywords`
+    found in the message; two matches give the full `keyword_weight`)
+    + cosine similarity of hashed character n-gram vectors of the
+    message and the tool's name, keywords and description. Tool
+    vectors are computed once and cached.
+    
+    Attributes:
+        keyword_weight: Weight of the keyword score.
+        _cache: Tool name -> (definition text, keywords, vector).
+    """
+    
+    def __init__(self, keyword_weight: float = 0.5):
+        self.keyword_weight = keyword_weight
+        self._cache: Dict[str, Tuple[str, Set[str], Dict[int, float]]] = {}
+    
+    def _tool_features(self, definition: ToolDefinition) -> Tuple[Set[str], Dict[int, float]]:
+        """Keywords and vector of a tool (cached until its definition changes)."""
+        names = f"{definition.name} {' '.join(definition.keywords)}"
+        text = f"{names} {definition.description}"
+        cached = self._cache.get(definition.name)
+        if cached and cached[0] == text:
+            return cached[1], cached[2]
+        
+        keywords = _words(names)
+        vector = _vector(text)
+        self._cache[definition.name] = (text, keywords, vector)
+        return keywords, vector
+    
+    def score(self, message: str, definitions: List[ToolDefinition]) -> Dict[str, float]:
+        """
+        Score tools against a message.
+        
+        Args:
+            message: User message.
+            definitions: Tool definitions to score.
+        
+        Returns:
+            Tool name -> relevance score.
+        """
+        message_words = _words(message)
+        message_vector = _vector(message)
+        
+        scores = {}
+        for definition in definitions:
+            keywords, vector = self._tool_features(definition)
+            keyword_score = min(1.0, len(keywords & message_words) / 2)
+            scores[definition.name] = (
+                self.keyword_weight * keyword_score + _cosine(message_vector, vector)
+            )
+        return scores
+    
+    def forget(self, name: str) -> None:
+        """Drop the cached features of a tool."""
+        self._cache.pop(name, None)
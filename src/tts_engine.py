@@ -3,15 +3,19 @@ TAMARA TTS Engine Module
 Text-to-speech engine using Kokoro + Misaki.
 """
 
+import asyncio
 import base64
 import io
 import os
-from typing import Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
 
 import numpy as np
 import soundfile as sf
 
 from .config import get_config
+from .tts_pool import TTSWorkerPool, get_tts_pool
 
 
 class TTSEngine:
@@ -19,14 +23,30 @@ class TTSEngine:
     Text-to-Speech engine using Kokoro ONNX and Misaki G2P.
     
     Converts text to audio using phonemization for better pronunciation.
+    
+    Synthesis is blocking (ONNX inference takes hundreds of ms per
+    sentence), so async callers use `generate_wav_async`, which runs
+    it in a dedicated thread pool of `tts.workers` threads. At most
+    `workers + max_pending` requests are submitted at once; the rest
+    wait on the event loop, so the pool queue stays bounded. ONNX
+    Runtime inference is thread-safe; the espeak-based G2P is not and
+    is serialized by a lock.
+    
+    With `tts.processes` > 0, synthesis runs instead on a pool of
+    worker processes (see TTSWorkerPool), each with its own model.
     """
     
     def __init__(self):
         self._kokoro = None
         self._g2p = None
+        self._g2p_lock = threading.Lock()
         self._voice_style = None
         self._ready = False
         self._config = get_config().tts
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._pool: Optional[TTSWorkerPool] = None
+        self._voices: List[str] = []
     
     @property
     def is_ready(self) -> bool:
@@ -54,6 +74,9 @@ class TTSEngine:
             print(f"[TTS] ERROR: Voices not found: {config.voices_path}")
             return False
         
+        if config.processes > 0:
+            return self._initialize_pool()
+        
         try:
             print("[TTS] Initializing Kokoro v1.0 + Misaki...")
             
@@ -84,7 +107,34 @@ class TTSEngine:
             print(f"[TTS] Initialization ERROR: {e}")
             return False
     
-    def generate_audio(self, text: str) -> Optional[str]:
+    def _initialize_pool(self) -> bool:
+        """
+        Start the worker processes (each loads its own model).
+        
+        Returns:
+            True if all workers started.
+        """
+        try:
+            print(f"[TTS] Starting {self._config.processes} Kokoro worker processes...")
+            self._pool = get_tts_pool()
+            self._voices = self._pool.start()
+            
+            if self._config.voice not in self._voices:
+                print(f"[TTS] Voice '{self._config.voice}' not found, using 'ef_dora'")
+                self._config.voice = 'ef_dora'
+            
+            self._ready = True
+            print(f"[TTS] Engine ready! Voice: {self._config.voice}")
+            return True
+            
+        except Exception as e:
+            print(f"[TTS] Initialization ERROR: {e}")
+            if self._pool:
+                self._pool.shutdown()
+                self._pool = None
+            return False
+    
+    def generate_wav(self, text: str) -> Optional[bytes]:
         """
         Generate audio from text.
         
@@ -92,9 +142,9 @@ class TTSEngine:
             text: Text to convert to audio.
             
         Returns:
-            Base64 encoded audio (WAV), or None on error.
+            WAV audio, or None on error.
         """
-        if not self._ready:
+        if not self._ready or self._kokoro is None:
             print("[TTS] Engine not initialized")
             return None
         
@@ -103,7 +153,8 @@ class TTSEngine:
         
         try:
             # Step 1: Convert text to phonemes
-            phonemes, _ = self._g2p(text)
+            with self._g2p_lock:
+                phonemes, _ = self._g2p(text)
             
             # Step 2: Generate audio from phonemes
             audio, sample_rate = self._kokoro.create(
@@ -116,15 +167,76 @@ class TTSEngine:
             # Step 3: Convert to WAV in memory
             buffer = io.BytesIO()
             sf.write(buffer, audio, sample_rate, format='WAV')
-            buffer.seek(0)
-            
-            # Step 4: Encode to Base64
-            return base64.b64encode(buffer.read()).decode('utf-8')
+            return buffer.getvalue()
             
         except Exception as e:
             print(f"[TTS] Error generating audio: {e}")
             return None
     
+    def generate_audio(self, text: str) -> Optional[str]:
+        """
+        Generate audio from text, Base64 encoded.
+        
+        Args:
+            text: Text to convert to audio.
+            
+        Returns:
+            Base64 encoded audio (WAV), or None on error.
+        """
+        wav = self.generate_wav(text)
+        return base64.b64encode(wav).decode('utf-8') if wav else None
+    
+    async def generate_wav_async(self, text: str) -> Optional[bytes]:
+        """
+        Generate audio from text without blocking the event loop.
+        
+        If the awaiting task is cancelled before synthesis starts, the
+        request is dropped from the pool queue.
+        
+        Args:
+            text: Text to convert to audio.
+            
+        Returns:
+            WAV audio, or None on error.
+        """
+        if not text or not text.strip():
+            return None
+        
+        if self._slots is None:
+            workers = self._pool.size if self._pool else max(1, self._config.workers)
+            if not self._pool:
+                self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tts")
+            self._slots = asyncio.Semaphore(workers + max(0, self._config.max_pending))
+        
+        async with self._slots:
+            if self._pool:
+                return await self._pool.synthesize(text, self._config.voice, self._config.speed)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self.generate_wav, text)
+    
+    async def generate_audio_async(self, text: str) -> Optional[str]:
+        """
+        Generate audio from text without blocking the event loop.
+        
+        Args:
+            text: Text to convert to audio.
+            
+        Returns:
+            Base64 encoded audio (WAV), or None on error.
+        """
+        wav = await self.generate_wav_async(text)
+        return base64.b64encode(wav).decode('utf-8') if wav else None
+    
+    def shutdown(self) -> None:
+        """Stop the synthesis threads or processes, dropping queued requests."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        self._slots = None
+    
     def set_voice(self, voice_name: str) -> bool:
         """
         Change the active voice.
@@ -138,6 +250,15 @@ class TTSEngine:
         if not self._ready:
             return False
         
+        if self._pool:
+            # Workers load voice styles on first use
+            if voice_name not in self._voices:
+                print(f"[TTS] Voice '{voice_name}' not available")
+                return False
+            self._config.voice = voice_name
+            print(f"[TTS] Voice changed to: {voice_name}")
+            return True
+        
         try:
             self._voice_style = self._kokoro.get_voice_style(voice_name)
             self._config.voice = voice_name
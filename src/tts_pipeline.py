@@ -0,0 +1,110 @@
+"""
+TAMARA TTS Pipeline Module
+Per-turn sentence pipeline: concurrent synthesis, ordered emission.
+"""
+
+import asyncio
+from collections import deque
+from typing import Awaitable, Callable, Deque, Optional
+
+from .config import get_config
+from .tts_engine import get_tts_engine
+
+
+# Called with (sequence number, WAV audio) for each sentence, in order
+AudioSender = Callable[[int, bytes], Awaitable[None]]
+
+
+class TTSPipeline:
+    """
+    Text-to-speech pipeline of one response.
+    
+    Sentences are submitted as soon as they are segmented. Up to
+    `tts.pipeline_depth` of them are synthesized concurrently (on top
+    of the engine's global limit), while an emitter task sends the
+    results strictly in submission order, numbered from 0. A sentence
+    whose synthesis fails is skipped without breaking the numbering.
+    
+    Usage:
+        pipeline = TTSPipeline(send)
+        pipeline.submit("Hola.")
+        ...
+        await pipeline.finish()   # or pipeline.cancel() on barge-in
+    
+    Attributes:
+        _send: Coroutine sending one audio chunk to the client.
+        _slots: Concurrent synthesis limit of this response.
+        _pending: Synthesis tasks not emitted yet, in order.
+        _ready: Signals the emitter that a sentence was submitted.
+        _closed: No more sentences will be submitted.
+        _emitter: Task sending the audio in order.
+        _seq: Sequence number of the next emitted chunk.
+    """
+    
+    def __init__(self, send: AudioSender, depth: Optional[int] = None):
+        self._send = send
+        self._tts = get_tts_engine()
+        self._slots = asyncio.Semaphore(max(1, depth or get_config().tts.pipeline_depth))
+        self._pending: Deque[asyncio.Task] = deque()
+        self._ready = asyncio.Event()
+        self._closed = False
+        self._emitter: Optional[asyncio.Task] = None
+        self._seq = 0
+    
+    @property
+    def sent(self) -> int:
+        """Number of audio chunks sent so far."""
+        return self._seq
+    
+    def submit(self, text: str) -> None:
+        """
+        Queue a sentence for synthesis (returns immediately).
+        
+        Args:
+            text: Sentence to speak.
+        """
+        clean_text = text.replace("[", "").replace("]", "").strip()
+        if not clean_text:
+            return
+        
+        self._pending.append(asyncio.create_task(self._synthesize(clean_text)))
+        self._ready.set()
+        if self._emitter is None:
+            self._emitter = asyncio.create_task(self._emit())
+    
+    async def _synthesize(self, text: str) -> Optional[bytes]:
+        """Synthesize one sentence within the pipeline's concurrency limit."""
+        async with self._slots:
+            return await self._tts.generate_wav_async(text)
+    
+    async def _emit(self) -> None:
+        """Send synthesized sentences in order until closed and drained."""
+        while True:
+            if not self._pending:
+                if self._closed:
+                    return
+                self._ready.clear()
+                await self._ready.wait()
+                continue
+            
+            wav = await self._pending[0]
+            self._pending.popleft()
+            if wav:
+                await self._send(self._seq, wav)
+                self._seq += 1
+    
+    async def finish(self) -> None:
+        """Wait until every submitted sentence has been sent."""
+        self._closed = True
+        self._ready.set()
+        if self._emitter:
+            await self._emitter
+    
+    def cancel(self) -> None:
+        """Drop pending synthesis and stop sending (barge-in)."""
+        self._closed = True
+        if self._emitter and not self._emitter.done():
+            self._emitter.cancel()
+        for task in self._pending:
+            task.cancel()
+        self._pending.clear()
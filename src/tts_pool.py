@@ -0,0 +1,240 @@
+"""
+TAMARA TTS Pool Module
+Kokoro synthesis across several worker processes.
+"""
+
+import asyncio
+import io
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional
+
+from .config import get_config
+
+
+# =============================================================================
+# Worker process side
+# =============================================================================
+
+# Per-process state, set by _init_worker
+_worker: Dict[str, Any] = {}
+
+
+def _init_worker(model_path: str, voices_path: str, language: str,
+                 intra_op_threads: int, cores: Optional[List[int]]) -> None:
+    """
+    Load Kokoro and the G2P in a worker process.
+    
+    Args:
+        model_path: Kokoro ONNX model.
+        voices_path: Voices file.
+        language: G2P language.
+        intra_op_threads: ONNX Runtime threads for this worker.
+        cores: CPU cores to pin the process to (None = no pinning).
+    """
+    if cores and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    
+    import onnxruntime as ort
+    from kokoro_onnx import Kokoro
+    from misaki import espeak
+    from misaki.espeak import EspeakG2P
+    
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = intra_op_threads
+    options.inter_op_num_threads = 1
+    session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+    
+    espeak.EspeakFallback(british=False)
+    
+    _worker["kokoro"] = Kokoro.from_session(session, voices_path)
+    _worker["g2p"] = EspeakG2P(language=language)
+    _worker["styles"] = {}
+
+
+def _worker_voices() -> List[str]:
+    """Voices available in the worker (also proves it started)."""
+    return list(_worker["kokoro"].get_voices())
+
+
+def _synthesize(text: str, voice: str, speed: float) -> bytes:
+    """
+    Synthesize a text in the worker process.
+    
+    Args:
+        text: Text to convert to audio.
+        voice: Voice name.
+        speed: Speech speed.
+    
+    Returns:
+        WAV audio.
+    """
+    import soundfile as sf
+    
+    kokoro = _worker["kokoro"]
+    styles = _worker["styles"]
+    if voice not in styles:
+        styles[voice] = kokoro.get_voice_style(voice)
+    
+    phonemes, _ = _worker["g2p"](text)
+    audio, sample_rate = kokoro.create(phonemes, voice=styles[voice], speed=speed, is_phonemes=True)
+    
+    buffer = io.BytesIO()
+    sf.write(buffer, audio, sample_rate, format='WAV')
+    return buffer.getvalue()
+
+
+# =============================================================================
+# Dispatcher
+# =============================================================================
+
+class _Worker:
+    """A single-process executor holding one Kokoro instance."""
+    
+    def __init__(self, index: int, cores: Optional[List[int]]):
+        self.index = index
+        self.cores = cores
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.outstanding = 0
+        self.restarts = 0
+
+
+class TTSWorkerPool:
+    """
+    Pool of Kokoro worker processes.
+    
+    Each worker is a one-process executor with its own ONNX Runtime
+    session (limited to `tts.intra_op_threads` threads, optionally
+    pinned to its own cores) and its own G2P, so sentences synthesize
+    in parallel on separate cores instead of one at a time.
+    
+    Sentences go to the worker with the fewest outstanding requests. A
+    worker that crashes is restarted and the sentence is retried once.
+    
+    Attributes:
+        _config: TTS configuration.
+        _workers: Worker processes.
+        _lock: Guards worker restarts.
+    """
+    
+    def __init__(self):
+        self._config = get_config().tts
+        self._workers: List[_Worker] = []
+        self._lock = threading.Lock()
+    
+    @property
+    def size(self) -> int:
+        """Number of worker processes."""
+        return len(self._workers)
+    
+    def _cores(self, index: int) -> Optional[List[int]]:
+        """CPU cores of a worker when pinning is enabled."""
+        if not self._config.pin_cores or not hasattr(os, "sched_setaffinity"):
+            return None
+        available = sorted(os.sched_getaffinity(0))
+        threads = max(1, self._config.intra_op_threads)
+        start = (index * threads) % len(available)
+        return sorted({available[(start + i) % len(available)] for i in range(threads)})
+    
+    def _spawn(self, worker: _Worker) -> None:
+        """Create (or re-create) the process of a worker."""
+        config = self._config
+        worker.executor = ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(config.model_path, config.voices_path, config.language,
+                      max(1, config.intra_op_threads), worker.cores)
+        )
+    
+    def start(self) -> List[str]:
+        """
+        Start the worker processes and wait until all have loaded.
+        
+        Returns:
+            Available voice names.
+        """
+        for index in range(max(1, self._config.processes)):
+            worker = _Worker(index, self._cores(index))
+            self._spawn(worker)
+            self._workers.append(worker)
+        
+        # Every worker loads its model before the pool is reported ready
+        futures = [w.executor.submit(_worker_voices) for w in self._workers]
+        voices = [f.result() for f in futures][0]
+        print(f"[TTS] {self.size} worker processes ready "
+              f"({self._config.intra_op_threads} threads each)")
+        return voices
+    
+    def _pick(self) -> _Worker:
+        """Worker with the fewest outstanding requests."""
+        return min(self._workers, key=lambda w: w.outstanding)
+    
+    def _restart(self, worker: _Worker, executor: ProcessPoolExecutor) -> None:
+        """Replace a crashed worker process (once per crash)."""
+        with self._lock:
+            if worker.executor is not executor:
+                return  # Already restarted by another request
+            executor.shutdown(wait=False, cancel_futures=True)
+            worker.restarts += 1
+            print(f"[TTS] Worker {worker.index} crashed, restarting")
+            self._spawn(worker)
+    
+    async def synthesize(self, text: str, voice: str, speed: float) -> Optional[bytes]:
+        """
+        Synthesize a text on the least busy worker.
+        
+        Args:
+            text: Text to convert to audio.
+            voice: Voice name.
+            speed: Speech speed.
+        
+        Returns:
+            WAV audio, or None on error.
+        """
+        for attempt in range(2):
+            worker = self._pick()
+            executor = worker.executor
+            worker.outstanding += 1
+            try:
+                future: Future = executor.submit(_synthesize, text, voice, speed)
+                return await asyncio.wrap_future(future)
+            except BrokenProcessPool:
+                self._restart(worker, executor)
+            except Exception as e:
+                print(f"[TTS] Error generating audio: {e}")
+                return None
+            finally:
+                worker.outstanding -= 1
+        return None
+    
+    @property
+    def status(self) -> List[Dict[str, Any]]:
+        """Per-worker load and restart counts."""
+        return [
+            {"worker": w.index, "outstanding": w.outstanding,
+             "restarts": w.restarts, "cores": w.cores}
+            for w in self._workers
+        ]
+    
+    def shutdown(self) -> None:
+        """Stop the worker processes."""
+        for worker in self._workers:
+            if worker.executor is not None:
+                worker.executor.shutdown(wait=False, cancel_futures=True)
+        self._workers = []
+
+
+# Singleton instance
+_tts_pool: Optional[TTSWorkerPool] = None
+
+
+def get_tts_pool() -> TTSWorkerPool:
+    """Get TTS worker pool instance (singleton)."""
+    global _tts_pool
+    if _tts_pool is None:
+        _tts_pool = TTSWorkerPool()
+    return _tts_pool
@@ -4,13 +4,19 @@ Handles WebSocket connections and message processing.
 Includes Tool Calling support and tool notifications.
 """
 
+import asyncio
+import base64
+from contextlib import aclosing
 from typing import Set, Optional
 from dataclasses import dataclass, field
 
 from fastapi import WebSocket, WebSocketDisconnect
 
-from .tts_engine import get_tts_engine
-from .llm_engine import get_llm_engine
+from .admission import QueueFullError
+from .response_cache import CachedResponse, get_response_cache
+from .session_manager import Session, get_session_manager
+from .text_segmenter import SentenceSegmenter
+from .tts_pipeline import TTSPipeline
 
 
 @dataclass
@@ -50,25 +56,51 @@ class WebSocketHandler:
     Integrates LLM (with Tool Calling) and TTS to process messages
     and generate responses with agentic capabilities.
     
+    Each connection is attached to its own conversation session. Clients
+    can resume a previous session with `/ws?session_id=<id>`.
+    
+    Audio is sent as Base64 WAV inside JSON by default. Clients that
+    connect with `/ws?audio=binary` receive instead, per audio chunk,
+    an `audio_header` JSON frame followed by one binary frame with the
+    raw WAV (no Base64 inflation or JSON encoding of the payload).
+    
     Supported message types:
-    - message: User chat message
+    - message: User chat message (optional "source": "voice" | "text";
+      voice turns are served first when the LLM is busy)
+    - cancel: Stop the response in progress
+    - settings: Override generation settings for this session
+      (num_predict, stop, max_answer_words, max_answer_sentences)
     - ping: Keepalive
     - reset: Reset history
     
+    Chat turns run as a background task, so the connection keeps
+    reading messages while a response is generated. A new message,
+    cancel or reset interrupts the turn in progress (barge-in): the
+    Ollama stream, running tools/DB queries and pending TTS are
+    cancelled.
+    
     Response types:
+    - session: Session id assigned to the connection
     - thinking: LLM is processing
+    - queued: Waiting for a free LLM slot (with queue position)
     - token: A response token
     - tool_executing: A tool is being executed
     - tool_result: Tool execution result
-    - audio: TTS audio chunk
-    - done: Response completed
+    - audio: TTS audio chunk (sentences in order, "seq" from 0 per response)
+    - audio_header: Binary audio mode; the next frame is the WAV of this
+      "seq" ("bytes" long)
+    - done: Response completed (with the turn's generation stats,
+      except for cached answers)
+    - cancelled: Response in progress was interrupted
+    - settings: Current generation settings of the session
     - error: Processing error
     """
     
     def __init__(self):
         self.manager = ConnectionManager()
-        self._tts = get_tts_engine()
-        self._llm = get_llm_engine()
+        self._sessions = get_session_manager()
+        self._cache = get_response_cache()
+        self._binary_audio: Set[WebSocket] = set()
     
     async def handle_connection(self, websocket: WebSocket) -> None:
         """
@@ -78,50 +110,119 @@ class WebSocketHandler:
             websocket: Client WebSocket connection.
         """
         await self.manager.connect(websocket)
+        session: Optional[Session] = None
+        turn: Optional[asyncio.Task] = None
+        
+        binary = websocket.query_params.get("audio") == "binary"
+        if binary:
+            self._binary_audio.add(websocket)
         
         try:
+            session = await self._sessions.attach(websocket.query_params.get("session_id"))
+            await websocket.send_json({
+                "type": "session",
+                "session_id": session.session_id,
+                "history_length": session.engine.history_length,
+                "audio": "binary" if binary else "base64"
+            })
+            
             while True:
                 data = await websocket.receive_json()
-                await self._process_message(websocket, data)
+                msg_type = data.get("type", "")
+                
+                # Barge-in: new input interrupts the response in progress
+                if msg_type in ("message", "cancel", "reset") and turn and not turn.done():
+                    await self._cancel_turn(websocket, turn)
+                
+                if msg_type == "message":
+                    turn = asyncio.create_task(self._run_turn(websocket, session, data))
+                elif msg_type != "cancel":
+                    await self._process_message(websocket, session, data)
                 
         except WebSocketDisconnect:
-            self.manager.disconnect(websocket)
+            pass
         except Exception as e:
             print(f"[WS] Error: {e}")
+        finally:
+            if turn and not turn.done():
+                turn.cancel()
+            self._binary_audio.discard(websocket)
+            if session:
+                self._sessions.detach(session)
             self.manager.disconnect(websocket)
     
-    async def _process_message(self, websocket: WebSocket, data: dict) -> None:
+    async def _run_turn(self, websocket: WebSocket, session: Session, data: dict) -> None:
+        """
+        Run a chat turn in its own task.
+        
+        Args:
+            websocket: Client connection.
+            session: Conversation session of the connection.
+            data: Message data.
+        """
+        try:
+            await self._process_message(websocket, session, data)
+        except Exception as e:
+            # Typically the client went away mid-response
+            print(f"[WS] Turn error: {e}")
+    
+    async def _cancel_turn(self, websocket: WebSocket, turn: asyncio.Task) -> None:
+        """
+        Cancel a running chat turn and wait until it has stopped.
+        
+        Args:
+            websocket: Client connection.
+            turn: Task running the turn.
+        """
+        turn.cancel()
+        await asyncio.wait([turn])
+        print("[WS] Response interrupted")
+        await websocket.send_json({"type": "cancelled"})
+    
+    async def _process_message(self, websocket: WebSocket, session: Session, data: dict) -> None:
         """
         Process a received message.
         
         Args:
             websocket: Client connection.
+            session: Conversation session of the connection.
             data: Message data.
         """
         msg_type = data.get("type", "")
+        session.touch()
         
         if msg_type == "message":
-            await self._handle_chat_message(websocket, data.get("content", ""))
+            session.engine.set_priority(data.get("source", "text"))
+            await self._handle_chat_message(websocket, session, data.get("content", ""))
+        
+        elif msg_type == "settings":
+            try:
+                settings = session.engine.update_settings(data.get("settings") or {})
+            except ValueError as e:
+                await websocket.send_json({"type": "error", "content": str(e)})
+                return
+            await websocket.send_json({"type": "settings", "settings": settings})
         
         elif msg_type == "ping":
             await websocket.send_json({"type": "pong"})
         
         elif msg_type == "reset":
-            self._llm.reset()
+            session.engine.reset()
             await websocket.send_json({
                 "type": "system",
                 "content": "History reset"
             })
     
-    async def _handle_chat_message(self, websocket: WebSocket, content: str) -> None:
+    async def _handle_chat_message(self, websocket: WebSocket, session: Session, content: str) -> None:
         """
         Process a user chat message.
         
-        If tools are enabled, uses chat_with_tools.
-        Otherwise, uses simple chat_stream.
+        If the response cache has this turn, replays it. Otherwise, if
+        tools are enabled, uses chat_with_tools, else simple chat_stream.
         
         Args:
             websocket: Client connection.
+            session: Conversation session.
             content: Message content.
         """
         if not content or len(content) < 2:
@@ -130,16 +231,44 @@ class WebSocketHandler:
         # Notify that we're processing
         await websocket.send_json({"type": "thinking"})
         
+        async def on_queue_position(position: int) -> None:
+            await websocket.send_json({"type": "queued", "position": position})
+        
+        session.engine.on_queue_position = on_queue_position
+        
         try:
+            cache_key = None
+            recorder = None
+            if self._cache.cacheable(content):
+                cache_key = self._cache.make_key(content, session.engine.cache_fingerprint())
+                cached = self._cache.get(cache_key)
+                if cached:
+                    await self._replay_cached(websocket, session, content, cached)
+                    await websocket.send_json({"type": "done"})
+                    return
+                recorder = CachedResponse()
+            
             # Decide which method to use based on tools availability
-            if self._llm.tools_enabled:
-                await self._handle_chat_with_tools(websocket, content)
+            if session.engine.tools_enabled:
+                await self._handle_chat_with_tools(websocket, session, content, recorder)
             else:
-                await self._handle_simple_chat(websocket, content)
+                await self._handle_simple_chat(websocket, session, content, recorder)
             
-            # Notify response complete
-            await websocket.send_json({"type": "done"})
+            # Errors and degraded (fallback) answers are not worth reusing
+            if (recorder and not session.engine.degraded
+                    and not any("[Error" in token for token in recorder.tokens)):
+                self._cache.put(cache_key, recorder)
             
+            # Notify response complete, with the turn's generation stats
+            await websocket.send_json({"type": "done", "stats": session.engine.turn_stats})
+            
+        except QueueFullError as e:
+            print("[WS] Request rejected: LLM queue full")
+            await websocket.send_json({
+                "type": "error",
+                "code": "busy",
+                "content": str(e)
+            })
         except Exception as e:
             print(f"[WS] Chat error: {e}")
             await websocket.send_json({
@@ -147,44 +276,79 @@ class WebSocketHandler:
                 "content": str(e)
             })
     
-    async def _handle_simple_chat(self, websocket: WebSocket, content: str) -> None:
+    async def _replay_cached(self, websocket: WebSocket, session: Session,
+                             content: str, cached: CachedResponse) -> None:
         """
-        Handle simple chat without tools.
+        Replay a cached turn (tokens and audio) and record it in history.
         
         Args:
             websocket: Client connection.
+            session: Conversation session.
             content: User message.
+            cached: Cached response.
         """
-        buffer = ""
-        
-        # Stream tokens from LLM
-        for token in self._llm.chat_stream(content):
-            # Send token to client
+        for token in cached.tokens:
             await websocket.send_json({
                 "type": "token",
                 "content": token
             })
+        
+        for seq, wav in enumerate(cached.audio):
+            await self._send_wav(websocket, seq, wav)
+        
+        session.engine.record_exchange(content, cached.text)
+    
+    async def _handle_simple_chat(self, websocket: WebSocket, session: Session, content: str,
+                                  recorder: Optional[CachedResponse] = None) -> None:
+        """
+        Handle simple chat without tools.
+        
+        Args:
+            websocket: Client connection.
+            session: Conversation session.
+            content: User message.
+            recorder: Collects tokens and audio for the response cache.
+        """
+        segmenter = SentenceSegmenter()
+        pipeline = self._audio_pipeline(websocket, recorder)
+        
+        try:
+            # Stream tokens from LLM (closed right away on barge-in)
+            async with aclosing(session.engine.chat_stream(content)) as tokens:
+                async for token in tokens:
+                    # Send token to client
+                    await websocket.send_json({
+                        "type": "token",
+                        "content": token
+                    })
+                    if recorder:
+                        recorder.tokens.append(token)
+                    
+                    # Queue completed sentences for audio
+                    for chunk in segmenter.feed(token):
+                        pipeline.submit(chunk)
             
-            buffer += token
+            # Send audio for remaining text
+            for chunk in segmenter.flush():
+                pipeline.submit(chunk)
             
-            # When a sentence ends, generate audio
-            if token in ['.', '!', '?', '\n', ':'] and buffer.strip():
-                await self._send_audio(websocket, buffer)
-                buffer = ""
-        
-        # Send audio for remaining buffer
-        if buffer.strip():
-            await self._send_audio(websocket, buffer)
+            await pipeline.finish()
+        finally:
+            pipeline.cancel()
     
-    async def _handle_chat_with_tools(self, websocket: WebSocket, content: str) -> None:
+    async def _handle_chat_with_tools(self, websocket: WebSocket, session: Session, content: str,
+                                      recorder: Optional[CachedResponse] = None) -> None:
         """
         Handle chat with tool support.
         
         Args:
             websocket: Client connection.
+            session: Conversation session.
             content: User message.
+            recorder: Collects tokens and audio for the response cache.
         """
-        buffer = ""
+        segmenter = SentenceSegmenter()
+        pipeline = self._audio_pipeline(websocket, recorder)
         
         # Callbacks to notify client about tools
         async def on_tool_start(tool_name: str):
@@ -200,59 +364,89 @@ class WebSocketHandler:
                 "result": result[:200]  # Limit result size
             })
         
-        # Use async generator with tools
-        async for token in self._llm.chat_with_tools(
-            content,
-            on_tool_start=lambda t: websocket.send_json({"type": "tool_executing", "tool": t}),
-            on_tool_end=lambda t, r: None  # Internal logging only
-        ):
-            # Detect tool status messages
-            if token.startswith("[Executing:"):
-                await websocket.send_json({
-                    "type": "tool_executing",
-                    "tool": token.replace("[Executing:", "").replace("...]", "").strip()
-                })
-                continue
-            
-            # Send token to client
-            await websocket.send_json({
-                "type": "token",
-                "content": token
-            })
-            
-            buffer += token
+        try:
+            # Use async generator with tools (closed right away on barge-in)
+            replies = session.engine.chat_with_tools(
+                content,
+                on_tool_start=lambda t: websocket.send_json({"type": "tool_executing", "tool": t}),
+                on_tool_end=lambda t, r: None  # Internal logging only
+            )
+            async with aclosing(replies) as tokens:
+                async for token in tokens:
+                    # Detect tool status messages
+                    if token.startswith("[Executing:"):
+                        await websocket.send_json({
+                            "type": "tool_executing",
+                            "tool": token.replace("[Executing:", "").replace("...]", "").strip()
+                        })
+                        continue
+                    
+                    # Send token to client
+                    await websocket.send_json({
+                        "type": "token",
+                        "content": token
+                    })
+                    if recorder:
+                        recorder.tokens.append(token)
+                    
+                    # Queue completed sentences for audio
+                    for chunk in segmenter.feed(token):
+                        # Don't generate audio for tool messages
+                        if not chunk.startswith("["):
+                            pipeline.submit(chunk)
+                
+            # Send audio for remaining text
+            for chunk in segmenter.flush():
+                if not chunk.startswith("["):
+                    pipeline.submit(chunk)
             
-            # When a sentence ends, generate audio
-            if token in ['.', '!', '?', '\n', ':'] and buffer.strip():
-                # Don't generate audio for tool messages
-                if not buffer.startswith("["):
-                    await self._send_audio(websocket, buffer)
-                buffer = ""
-        
-        # Send audio for remaining buffer
-        if buffer.strip() and not buffer.startswith("["):
-            await self._send_audio(websocket, buffer)
+            await pipeline.finish()
+        finally:
+            pipeline.cancel()
     
-    async def _send_audio(self, websocket: WebSocket, text: str) -> None:
+    def _audio_pipeline(self, websocket: WebSocket,
+                        recorder: Optional[CachedResponse] = None) -> TTSPipeline:
         """
-        Generate and send TTS audio.
+        Create the TTS pipeline of a response.
         
         Args:
             websocket: Client connection.
-            text: Text to convert to audio.
+            recorder: Collects audio for the response cache.
+            
+        Returns:
+            Pipeline sending numbered audio chunks to the client.
         """
-        # Clean text of special characters
-        clean_text = text.replace("[", "").replace("]", "").strip()
+        async def send(seq: int, wav: bytes) -> None:
+            if recorder:
+                recorder.audio.append(wav)
+            await self._send_wav(websocket, seq, wav)
         
-        if not clean_text:
-            return
+        return TTSPipeline(send)
+    
+    async def _send_wav(self, websocket: WebSocket, seq: int, wav: bytes) -> None:
+        """
+        Send one audio chunk in the connection's audio format.
         
-        audio_b64 = self._tts.generate_audio(clean_text)
-        if audio_b64:
+        Args:
+            websocket: Client connection.
+            seq: Sequence number of the chunk within the response.
+            wav: WAV audio.
+        """
+        if websocket in self._binary_audio:
             await websocket.send_json({
-                "type": "audio",
-                "content": audio_b64
+                "type": "audio_header",
+                "seq": seq,
+                "format": "wav",
+                "bytes": len(wav)
             })
+            await websocket.send_bytes(wav)
+            return
+        
+        await websocket.send_json({
+            "type": "audio",
+            "content": base64.b64encode(wav).decode('utf-8'),
+            "seq": seq
+        })
 
 
 # Singleton instance
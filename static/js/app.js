@@ -8,6 +8,8 @@
 // ============================================
 const CONFIG = {
     wsUrl: `ws://${window.location.host}/ws`,
+    binaryAudio: true,  // Receive audio as binary WAV frames instead of Base64 JSON
+    sessionStorageKey: 'tamara_session_id',
     reconnectDelay: 3000,
     maxReconnectAttempts: 10,
     keepaliveInterval: 30000
@@ -21,13 +23,16 @@ class AppState {
         this.ws = null;
         this.isConnected = false;
         this.isProcessing = false;
+        this.isQueued = false;
         this.audioEnabled = true;
         this.audioQueue = [];
         this.isPlayingAudio = false;
+        this.currentAudio = null;
         this.currentAiMessage = null;
         this.reconnectAttempts = 0;
         this.recognition = null;
         this.micEnabled = false;
+        this.sessionId = localStorage.getItem(CONFIG.sessionStorageKey);
     }
 }
 
@@ -93,7 +98,12 @@ function connect() {
     log('Conectando al servidor...', 'info');
 
     try {
-        state.ws = new WebSocket(CONFIG.wsUrl);
+        const params = new URLSearchParams();
+        if (state.sessionId) params.set('session_id', state.sessionId);
+        if (CONFIG.binaryAudio) params.set('audio', 'binary');
+        const query = params.toString();
+        state.ws = new WebSocket(query ? `${CONFIG.wsUrl}?${query}` : CONFIG.wsUrl);
+        state.ws.binaryType = 'arraybuffer';
 
         state.ws.onopen = () => {
             state.isConnected = true;
@@ -129,32 +139,67 @@ function connect() {
 }
 
 function handleMessage(event) {
+    // Binary frame: WAV audio announced by the preceding 'audio_header'
+    if (event.data instanceof ArrayBuffer) {
+        if (state.audioEnabled) {
+            const blob = new Blob([event.data], { type: 'audio/wav' });
+            queueAudio(URL.createObjectURL(blob));
+        }
+        return;
+    }
+
     const data = JSON.parse(event.data);
 
     switch (data.type) {
+        case 'session':
+            state.sessionId = data.session_id;
+            localStorage.setItem(CONFIG.sessionStorageKey, data.session_id);
+            break;
+
         case 'thinking':
             showAiStatus('PENSANDO', 'thinking');
             startAiMessage();
             break;
 
+        case 'queued':
+            state.isQueued = true;
+            showAiStatus(`EN COLA (${data.position})`, 'thinking');
+            break;
+
         case 'token':
+            if (state.isQueued) {
+                state.isQueued = false;
+                showAiStatus('PENSANDO', 'thinking');
+            }
             appendToAiMessage(data.content);
             break;
 
         case 'audio':
             if (state.audioEnabled && data.content) {
-                state.audioQueue.push(data.content);
-                playNextAudio();
+                queueAudio(`data:audio/wav;base64,${data.content}`);
             }
             break;
 
+        case 'audio_header':
+            // The WAV follows as a binary frame
+            break;
+
         case 'done':
             hideAiStatus();
             finishAiMessage();
             state.isProcessing = false;
             break;
 
+        case 'cancelled':
+            // Interrupted response: drop its pending audio
+            state.isQueued = false;
+            stopAudio();
+            finishAiMessage();
+            hideAiStatus();
+            break;
+
         case 'error':
+            state.isQueued = false;
             log(`Error: ${data.content}`, 'error');
             hideAiStatus();
             state.isProcessing = false;
@@ -230,9 +275,15 @@ function finishAiMessage() {
     }
 }
 
-function sendMessage() {
+function sendMessage(source = 'text') {
     const text = elements.userInput.value.trim();
-    if (!text || !state.isConnected || state.isProcessing) return;
+    if (!text || !state.isConnected) return;
+
+    // Barge-in: the server interrupts the response in progress
+    if (state.isProcessing || state.isPlayingAudio) {
+        stopAudio();
+        finishAiMessage();
+    }
 
     addUserMessage(text);
     elements.userInput.value = '';
@@ -240,15 +291,41 @@ function sendMessage() {
 
     state.ws.send(JSON.stringify({
         type: 'message',
-        content: text
+        content: text,
+        source: source
     }));
 
     log(`Enviado: "${text.substring(0, 30)}..."`, 'info');
 }
 
+function cancelResponse() {
+    if (!state.isConnected || (!state.isProcessing && !state.isPlayingAudio)) return;
+
+    state.ws.send(JSON.stringify({ type: 'cancel' }));
+    stopAudio();
+    finishAiMessage();
+    hideAiStatus();
+    state.isProcessing = false;
+    log('Respuesta interrumpida', 'info');
+}
+
 // ============================================
 // Audio Playback
 // ============================================
+function queueAudio(src) {
+    state.audioQueue.push(src);
+    playNextAudio();
+}
+
+function releaseAudio(src) {
+    if (src.startsWith('blob:')) URL.revokeObjectURL(src);
+}
+
+function clearAudioQueue() {
+    state.audioQueue.forEach(releaseAudio);
+    state.audioQueue = [];
+}
+
 function playNextAudio() {
     if (state.isPlayingAudio || state.audioQueue.length === 0) return;
 
@@ -256,10 +333,13 @@ function playNextAudio() {
     elements.audioIndicator.classList.add('visible');
     showAiStatus('HABLANDO', 'connected');
 
-    const base64Audio = state.audioQueue.shift();
-    const audio = new Audio(`data:audio/wav;base64,${base64Audio}`);
+    const src = state.audioQueue.shift();
+    const audio = new Audio(src);
+    state.currentAudio = audio;
 
     audio.onended = () => {
+        releaseAudio(src);
+        state.currentAudio = null;
         state.isPlayingAudio = false;
         if (state.audioQueue.length > 0) {
             playNextAudio();
@@ -270,6 +350,7 @@ function playNextAudio() {
     };
 
     audio.onerror = () => {
+        releaseAudio(src);
         log('Error reproduciendo audio', 'error');
         state.isPlayingAudio = false;
         elements.audioIndicator.classList.remove('visible');
@@ -277,12 +358,26 @@ function playNextAudio() {
     };
 
     audio.play().catch(e => {
+        if (state.currentAudio !== audio) return;  // Stopped by barge-in
         log('Error: ' + e.message, 'error');
         state.isPlayingAudio = false;
         elements.audioIndicator.classList.remove('visible');
     });
 }
 
+function stopAudio() {
+    clearAudioQueue();
+    if (state.currentAudio) {
+        state.currentAudio.onended = null;
+        state.currentAudio.onerror = null;
+        state.currentAudio.pause();
+        releaseAudio(state.currentAudio.src);
+        state.currentAudio = null;
+    }
+    state.isPlayingAudio = false;
+    elements.audioIndicator.classList.remove('visible');
+}
+
 // ============================================
 // Speech Recognition (Web Speech API)
 // ============================================
@@ -310,7 +405,7 @@ function initSpeechRecognition() {
         elements.userInput.value = transcript;
 
         if (lastResult.isFinal && transcript.trim()) {
-            sendMessage();
+            sendMessage('voice');
             elements.userInput.value = '';
         }
     };
@@ -387,7 +482,10 @@ function toggleAudio() {
 
 async function resetChat() {
     try {
-        const response = await fetch('/api/reset', { method: 'POST' });
+        const response = await fetch(
+            `/api/reset?session_id=${encodeURIComponent(state.sessionId || '')}`,
+            { method: 'POST' }
+        );
         if (response.ok) {
             elements.chatHistory.innerHTML = `
                 <div class="message ai-message">
@@ -395,7 +493,7 @@ async function resetChat() {
                     ¡Hola! Soy TAMARA, tu asistente inteligente. ¿En qué puedo ayudarte hoy?
                 </div>
             `;
-            state.audioQueue = [];
+            clearAudioQueue();
             log('Chat reiniciado', 'success');
         }
     } catch (error) {
@@ -413,7 +511,7 @@ function reconnect() {
 // Event Listeners
 // ============================================
 function setupEventListeners() {
-    elements.sendButton.addEventListener('click', sendMessage);
+    elements.sendButton.addEventListener('click', () => sendMessage());
 
     elements.userInput.addEventListener('keypress', (e) => {
         if (e.key === 'Enter' && !e.shiftKey) {
@@ -422,6 +520,10 @@ function setupEventListeners() {
         }
     });
 
+    document.addEventListener('keydown', (e) => {
+        if (e.key === 'Escape') cancelResponse();
+    });
+
     elements.micButton.addEventListener('click', toggleMic);
     elements.audioToggle.addEventListener('click', toggleAudio);
     elements.reconnectBtn.addEventListener('click', reconnect);